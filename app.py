@@ -1,38 +1,190 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 from storyteller import (
+    ensure_tts_client,
     generate_audio, 
     generate_audio_with_accent,
+    get_audio_cache_stats,
     detect_regional_accent,
     get_cultural_themes, 
     get_supported_languages, 
     generate_cultural_facts
 )
-from models.story_generator import generate_story, generate_cultural_story
+from models.story_generator import (
+    generate_story,
+    generate_cultural_story,
+    generate_translated_story,
+    PipelinedTranslation,
+    get_scheduler_stats,
+    get_generation_stats,
+    is_model_idle,
+    has_waiting_requests,
+    stream_story,
+    translation_router,
+    warm_up_model
+)
 from models.image_generator import (
     generate_image, 
     generate_cultural_image, 
     generate_themed_image,
     # generate_multiple_images,
-    generate_video_frames
+    generate_video_frames,
+    plan_story_scenes,
+    get_image_cache_stats
 )
+from models.image_renditions import create_renditions
+from models.story_pool import StoryPool
 from video_creator import create_story_video, check_ffmpeg_installation, get_video_info
+from workspace import create_workspace, artifact_url, get_workspace_stats, start_workspace_cleanup
+import metrics
+from warmup import (
+    register_component,
+    start_background_warmup,
+    warm_up_component,
+    get_component_status,
+    is_ready
+)
 import os
+import json
 
 app = Flask(__name__)
 CORS(app)
 
+# Heavy components load lazily; start_background_warmup() loads them early
+# without delaying the moment Flask starts accepting connections.
+register_component("ffmpeg", check_ffmpeg_installation, required=False)
+register_component("story_model", warm_up_model)
+register_component("tts", ensure_tts_client, required=False)
+
 
 # Ensure static directory exists for generated files
 os.makedirs("static", exist_ok=True)
 
-# Serve static files (images, audio) to frontend
-@app.route("/static/<filename>")
+def produce_pooled_story(theme: str, language: str, should_stop=None):
+    """Generate one (story_text, english_story) pair for the story pool."""
+    story_text, eng_story = generate_cultural_story(theme, language, should_stop=should_stop)
+    if eng_story.startswith("Error"):
+        raise RuntimeError(eng_story)
+    return story_text, eng_story
+
+
+# Ready-made stories per (theme, language) for theme-only requests, refilled
+# in the background while the model is idle, and abandoned as soon as a user
+# request has to wait for the model. STORY_POOL_SIZE=0 turns it off.
+story_pool = StoryPool(
+    produce_pooled_story,
+    keys=[(theme, language) for theme in get_cultural_themes() for language in ("English", "Hindi")],
+    target_size=int(os.getenv("STORY_POOL_SIZE", "1")),
+    is_idle=is_model_idle,
+    should_yield=has_waiting_requests,
+)
+
+
+# Scrape-time gauges for /api/metrics; stage counters and latencies are
+# recorded by the pipeline functions themselves.
+metrics.register_gauge_callback(
+    "storyteller_llm_queue_depth", "Story generations waiting for the model",
+    lambda: get_scheduler_stats().get("queue_depth", 0),
+)
+metrics.register_gauge_callback(
+    "storyteller_llm_active_generations", "Story generations running on the model",
+    lambda: get_scheduler_stats().get("inflight", get_scheduler_stats().get("active_sequences", 0)),
+)
+metrics.register_gauge_callback(
+    "storyteller_story_cache_hit_ratio", "Seeded story cache hit rate",
+    lambda: get_generation_stats()["story_cache"]["hit_rate"],
+)
+metrics.register_gauge_callback(
+    "storyteller_translation_memory_hit_ratio", "Sentences served from the translation memory",
+    lambda: get_generation_stats()["translation_memory"].get("hit_rate", 0.0),
+)
+metrics.register_gauge_callback(
+    "storyteller_image_cache_hit_ratio", "Images served from the image cache",
+    lambda: get_image_cache_stats()["hit_rate"],
+)
+metrics.register_gauge_callback(
+    "storyteller_image_similar_prompt_hit_ratio", "Images reused from a near-identical earlier prompt",
+    lambda: get_image_cache_stats()["similar_prompts"].get("hit_rate", 0.0),
+)
+metrics.register_gauge_callback(
+    "storyteller_audio_cache_hit_ratio", "Narration chunks served from the narration cache",
+    lambda: get_audio_cache_stats().get("hit_rate", 0.0),
+)
+metrics.register_gauge_callback(
+    "storyteller_early_stop_tokens_saved", "Tokens not generated thanks to early stopping",
+    lambda: get_generation_stats()["early_stopping"]["tokens_saved"],
+)
+metrics.register_gauge_callback(
+    "storyteller_story_pool_ready", "Pooled stories ready to serve",
+    lambda: story_pool.stats()["ready"],
+)
+metrics.register_gauge_callback(
+    "storyteller_component_ready", "1 when a warm-up component has loaded",
+    lambda: {name: c["state"] == "ready" for name, c in get_component_status().items()},
+    label="component",
+)
+
+
+def get_theme_story(theme: str, language: str, seed=None, translator=None):
+    """Take a pooled story when possible, otherwise generate one now."""
+    if seed is None and translator is None:
+        pool_language = "Hindi" if language.strip().lower() == "hindi" else "English"
+        pooled = story_pool.take(theme, pool_language)
+        if pooled is not None:
+            print(f"📚 Serving pooled {theme} story ({pool_language})")
+            return pooled
+    return generate_cultural_story(theme, language, seed=seed, translator=translator)
+
+
+# Serve static files (images, audio) to frontend, including job workspaces
+@app.route("/static/<path:filename>")
 def serve_static_file(filename):
     """Serve generated static files (images, audio) to frontend."""
     return send_from_directory("static", filename)
 
 
+def parse_seed(data):
+    """
+    Optional non-negative integer "seed" from a request body (a number or a
+    string of digits); seeded stories are cached. Raises ValueError otherwise.
+    """
+    seed = data.get("seed")
+    if seed in (None, ""):
+        return None
+    if isinstance(seed, str) and seed.strip().isdigit():
+        return int(seed)
+    if isinstance(seed, int) and not isinstance(seed, bool) and seed >= 0:
+        return seed
+    raise ValueError(f"Invalid seed: {seed!r} (expected a non-negative integer)")
+
+
+# Upper bound for a client-supplied "max_tokens" (longer requests are clamped)
+STORY_MAX_TOKENS_LIMIT = int(os.getenv("STORY_MAX_TOKENS_LIMIT", "600"))
+
+
+def parse_max_tokens(data, default: int = 280):
+    """
+    Optional positive integer "max_tokens" from a request body, clamped to
+    STORY_MAX_TOKENS_LIMIT. Raises ValueError on anything else.
+    """
+    max_tokens = data.get("max_tokens")
+    if max_tokens in (None, ""):
+        return min(default, STORY_MAX_TOKENS_LIMIT)
+    if isinstance(max_tokens, str) and max_tokens.strip().isdigit():
+        max_tokens = int(max_tokens)
+    if not isinstance(max_tokens, int) or isinstance(max_tokens, bool) or max_tokens <= 0:
+        raise ValueError(f"Invalid max_tokens: {max_tokens!r} (expected a positive integer)")
+    return min(max_tokens, STORY_MAX_TOKENS_LIMIT)
+
+
+def parse_translator(data):
+    """Optional "translator" backend name from a request body (google, offline)."""
+    translator = data.get("translator") or None
+    if translator is not None and translator not in translation_router.backends:
+        raise ValueError(f"Unknown translator: {translator}")
+    return translator
+
+
 # 1 BASIC STORY MODE
 @app.route("/api/story", methods=["POST"])
 def create_story():
@@ -43,43 +195,116 @@ def create_story():
     
     if not text:
         return jsonify({"error": "No text provided"}), 400
+    try:
+        translator = parse_translator(data)
+        seed = parse_seed(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
         # Generate story text in English first
-        english_story = generate_story(text)
-        
-        # Translate to Hindi if Hindi language is selected
+        # Translate to Hindi if Hindi language is selected (scene by scene, while generating)
         if language == "Hindi" or "Hindi" in language:
-            from models.story_generator import translate_to_hindi
-            story_text = translate_to_hindi(english_story)
+            story_text, english_story = generate_translated_story(
+                text, seed=seed, translator=translator
+            )
         else:
+            english_story = generate_story(text, seed=seed)
             story_text = english_story
 
+        # Each request writes into its own workspace
+        workspace = create_workspace()
+
         # Generate narration with language support
-        audio_file = generate_audio(story_text, filename="static/story_audio.mp3", language=language)
+        audio_file = generate_audio(story_text, filename=workspace.path("story_audio.mp3"), language=language)
 
         # Generate image
         # image_file = generate_image(english_story, filename="static/story_image.png")
         image_file=generate_cultural_image(
             english_story,  
             culture="Indian",
-            filename="static/story_image.png"
+            filename=workspace.path("story_image.png")
         )
 
         
         return jsonify({
             "story": story_text,
-            "audio": f"http://localhost:5000/static/{os.path.basename(audio_file)}" if not audio_file.startswith("Error") else audio_file,
-            "image": f"http://localhost:5000/static/{os.path.basename(image_file)}" if not image_file.startswith("Error") else image_file,
+            "audio": artifact_url(audio_file) if not audio_file.startswith("Error") else audio_file,
+            "image": artifact_url(image_file) if not image_file.startswith("Error") else image_file,
             "audio_file": audio_file,  # Keep original path for download
             "image_file": image_file,  # Keep original path for download
-            "language": language
+            "image_renditions": image_renditions(image_file),  # Thumbnail/preview URLs for display
+            "language": language,
+            "job_id": workspace.job_id
         })
     
     except Exception as e:
         return jsonify({"error": f"Story generation failed: {str(e)}"}), 500
 
 
+def rendition_urls(renditions: dict) -> dict:
+    """{"thumb": url, "preview": url} for a create_renditions() result."""
+    return {name: artifact_url(path) for name, path in renditions.items()}
+
+
+def image_renditions(image_file: str) -> dict:
+    """Rendition URLs for a generated image, or {} when generation failed."""
+    if image_file.startswith("Error"):
+        return {}
+    return rendition_urls(create_renditions(image_file))
+
+
+def format_sse(event: str, data) -> str:
+    """Format one server-sent event; data is JSON-encoded so newlines survive."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# 1b STREAMING STORY MODE
+@app.route("/api/story/stream", methods=["GET", "POST"])
+def stream_story_endpoint():
+    """
+    Stream a basic story as server-sent events.
+    Events: token (each new token), scene (each finished paragraph), done (final story), error.
+    """
+    data = request.get_json(silent=True) or request.args
+    text = data.get("text", "")
+    language = data.get("language", "English")
+
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+    try:
+        translator = parse_translator(data)
+        max_tokens = parse_max_tokens(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def event_stream():
+        # Flush headers right away, even if the request has to wait for a model slot
+        yield ": connected\n\n"
+        # Hindi scenes are translated in the background as soon as they are finished
+        translation = PipelinedTranslation(translator) if "Hindi" in language else None
+        scene_index = 0
+        for event, payload in stream_story(text, max_tokens=max_tokens):
+            if event == "token":
+                yield format_sse("token", {"text": payload})
+            elif event == "scene":
+                scene_index += 1
+                if translation is not None:
+                    translation.add(payload)
+                yield format_sse("scene", {"index": scene_index, "text": payload})
+            elif event == "error":
+                yield format_sse("error", {"error": payload})
+            elif event == "done":
+                story_text = translation.finish(payload) if translation is not None else payload
+                yield format_sse("done", {"story": story_text, "english_story": payload, "language": language})
+
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # 2 CULTURAL STORY MODE
 @app.route("/api/cultural-story", methods=["POST"])
 def create_cultural_story():
@@ -93,22 +318,30 @@ def create_cultural_story():
     
     if not theme and not custom_prompt:
         return jsonify({"error": "Theme or custom prompt required"}), 400
+    try:
+        translator = parse_translator(data)
+        seed = parse_seed(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
         # Generate cultural story
         if custom_prompt:
-            story_text = generate_story(custom_prompt)
+            story_text = generate_story(custom_prompt, seed=seed)
         else:
-            story_text,eng_story = generate_cultural_story(theme, language)
+            story_text,eng_story = get_theme_story(theme, language, seed=seed, translator=translator)
 
         # Generate cultural facts
         cultural_fact = generate_cultural_facts(culture) if culture else ""
 
+        # Each request writes into its own workspace
+        workspace = create_workspace()
+
         # Generate culturally appropriate image
         image_file = generate_cultural_image(
             eng_story, 
             culture, 
-            filename="static/cultural_story_image.png"
+            filename=workspace.path("cultural_story_image.png")
         )
 
         # Generate narration
@@ -116,19 +349,21 @@ def create_cultural_story():
             story_text, 
             culture,
             region=region, 
-            filename="static/cultural_story_audio.mp3", 
+            filename=workspace.path("cultural_story_audio.mp3"), 
         )
 
         return jsonify({
             "story": story_text,
-            "audio": f"http://localhost:5000/static/{os.path.basename(audio_file)}" if not audio_file.startswith("Error") else audio_file,
-            "image": f"http://localhost:5000/static/{os.path.basename(image_file)}" if not image_file.startswith("Error") else image_file,
+            "audio": artifact_url(audio_file) if not audio_file.startswith("Error") else audio_file,
+            "image": artifact_url(image_file) if not image_file.startswith("Error") else image_file,
             "audio_file": audio_file,  # Keep original path for download
             "image_file": image_file,  # Keep original path for download
+            "image_renditions": image_renditions(image_file),  # Thumbnail/preview URLs for display
             "theme": theme,
             "culture": culture,
             "language": language,
-            "cultural_fact": cultural_fact
+            "cultural_fact": cultural_fact,
+            "job_id": workspace.job_id
         })
     
     except Exception as e:
@@ -195,6 +430,11 @@ def create_video_story():
     # num_frames = data.get("num_frames", 8)
 
     print(f"the input is data: {data}, theme: {theme}, language: {language}, region: {region}")
+    try:
+        translator = parse_translator(data)
+        seed = parse_seed(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     try:
         # Check if FFmpeg is available
@@ -205,28 +445,40 @@ def create_video_story():
             }), 400
         
         # Generate story using cultural story function
-        story_text, eng_story = generate_cultural_story(theme, language)
+        story_text, eng_story = get_theme_story(theme, language, seed=seed, translator=translator)
         print("===============================================APP.PY story_text===============================================")
         print("Generated story for video:", story_text)
         print("===============================================APP.PY eng_story===============================================")
         print("Generated English story for video:", eng_story)
+        # Audio, frames, filelist and video all go into this request's workspace
+        workspace = create_workspace()
+
+        # Plan the scenes first, so English narration can be split on the same boundaries
+        scene_plan = plan_story_scenes(eng_story)
+        narration_chunks = scene_plan["scenes"] if story_text == eng_story else None
+
         # Generate audio narration
         audio_file = None
+        narration_timings = []
         try:
             if language == "Hindi" or "Hindi" in language:
                 # Generate audio with accent
-                audio_file = generate_audio_with_accent(
+                audio_file, narration_timings = generate_audio_with_accent(
                     story_text, 
                     culture="Indian",        # fixed default culture
                     region=region,           # region from frontend
-                    filename="static/video_story_audio.mp3"
+                    filename=workspace.path("video_story_audio.mp3"),
+                    return_timings=True,
+                    chunks=narration_chunks
                 )
             else:
                 # Generate audio without accent
-                audio_file = generate_audio(
+                audio_file, narration_timings = generate_audio(
                     story_text, 
-                    filename="static/video_story_audio.mp3", 
-                    language=language
+                    filename=workspace.path("video_story_audio.mp3"), 
+                    language=language,
+                    return_timings=True,
+                    chunks=narration_chunks
                 )
         except Exception as e:
             print(f"⚠️ Audio generation failed: {e}")
@@ -235,17 +487,23 @@ def create_video_story():
 
 
         # Generate multiple images for video
-        video_frames = generate_video_frames(eng_story, culture)
+        video_frames = generate_video_frames(eng_story, culture, work_dir=workspace.directory, plan=scene_plan)
         
         if "error" in video_frames:
             return jsonify({"error": video_frames["error"]}), 500
+
+        scene_durations = video_frames["image_durations"]
+        if narration_chunks and len(narration_timings) == len(narration_chunks) == len(video_frames["images"]):
+            # Narrated scene by scene and every scene has a frame: use the measured lengths
+            scene_durations = [timing["duration"] for timing in narration_timings]
         
         # Create video
         video_file = create_story_video({
             "images": video_frames["images"],
             "audio_file": audio_file,
-            "story_scenes": video_frames["story_scenes"]
-        }, "cultural_story_video.mp4")
+            "story_scenes": video_frames["story_scenes"],
+            "scene_durations": scene_durations
+        }, "cultural_story_video.mp4", work_dir=workspace.directory)
         
         if video_file.startswith("Error"):
             return jsonify({"error": video_file}), 500
@@ -255,19 +513,22 @@ def create_video_story():
         
         return jsonify({
             "story": story_text,
-            "audio": f"http://localhost:5000/static/{os.path.basename(audio_file)}" if not audio_file.startswith("Error") else audio_file,
-            "video": f"http://localhost:5000/static/{os.path.basename(video_file)}",
-            "images": [f"http://localhost:5000/static/{os.path.basename(img)}" for img in video_frames["images"]],
+            "audio": artifact_url(audio_file) if not audio_file.startswith("Error") else audio_file,
+            "video": artifact_url(video_file),
+            "images": [artifact_url(img) for img in video_frames["images"]],
+            "image_renditions": [rendition_urls(r) for r in video_frames["renditions"]],
             "audio_file": audio_file,
             "video_file": video_file,
             "image_files": video_frames["images"],
+            "narration_timings": narration_timings,
             "video_info": video_info,
             "theme": theme,
             "culture": culture,
             "language": language,
             "region": region,
             "num_frames": len(video_frames["images"]),
-            "cultural_fact": generate_cultural_facts(culture)
+            "cultural_fact": generate_cultural_facts(culture),
+            "job_id": workspace.job_id
         })
         
     except Exception as e:
@@ -304,12 +565,19 @@ def create_video_story():
 
 @app.route("/api/health", methods=["GET"])
 def health_check():
-    """Health check endpoint."""
-    ffmpeg_available = check_ffmpeg_installation()
-    
+    """Health check endpoint with per-component readiness."""
+    if get_component_status()["ffmpeg"]["state"] == "pending":
+        # Cheap enough to answer right away instead of waiting for the warm-up
+        warm_up_component("ffmpeg")
+    components = get_component_status()
+    ffmpeg_available = components["ffmpeg"]["state"] == "ready"
+    ready = is_ready()
+
     return jsonify({
-        "status": "healthy",
+        "status": "healthy" if ready else "starting",
+        "ready": ready,
         "message": "Smart Cultural Storyteller API is running",
+        "components": components,
         "features": [
             "Story Generation (Orca Mini 3B)",
             "Hindi & English Support",
@@ -321,10 +589,33 @@ def health_check():
             "Cultural Themes",
             "Cultural Facts"
         ],
-        "ffmpeg_available": ffmpeg_available
+        "ffmpeg_available": ffmpeg_available,
+        "story_scheduler": get_scheduler_stats(),
+        "story_generation": get_generation_stats(),
+        "story_pool": story_pool.stats(),
+        "image_cache": get_image_cache_stats(),
+        "audio_cache": get_audio_cache_stats(),
+        "workspaces": get_workspace_stats()
     })
 
+@app.route("/api/ready", methods=["GET"])
+def readiness_probe():
+    """Readiness probe: 200 once required components are loaded, 503 before."""
+    ready = is_ready()
+    return jsonify({
+        "ready": ready,
+        "components": {name: c["state"] for name, c in get_component_status().items()}
+    }), 200 if ready else 503
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Per-stage counters, latency histograms and gauges in Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
+    start_background_warmup()
+    story_pool.start()
+    start_workspace_cleanup()
     app.run(
         host="0.0.0.0",
         port=5000,
@@ -0,0 +1,275 @@
+# caching.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+# Root folder for on-disk caches (stories, images, audio...)
+CACHE_ROOT = os.getenv("CACHE_DIR", "cache")
+
+
+def make_cache_key(*parts) -> str:
+    """Stable content hash of any JSON-serialisable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache with a fixed number of entries."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(0, int(max_entries))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class DiskCache:
+    """
+    Content-addressed files in one folder, bounded by total size.
+    A hit refreshes the file's mtime, and eviction removes the oldest mtimes
+    first, so the folder behaves like an LRU cache that survives restarts.
+    on_evict(key) is called for every entry removed to stay under max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = "", on_evict=None):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self.suffix = suffix
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self.evictions = 0
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def get_path(self, key: str):
+        """Return the cached file path for key (and mark it recently used), or None."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def get_bytes(self, key: str):
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        return self._commit(tmp_path, path)
+
+    def put_file(self, key: str, source_path: str) -> str:
+        """Copy an existing file into the cache and return the cached path."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_path, tmp_path)
+        return self._commit(tmp_path, path)
+
+    def _commit(self, tmp_path: str, path: str) -> str:
+        size = os.path.getsize(tmp_path)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        evicted = []
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size - previous
+            if self._total_bytes > self.max_bytes:
+                evicted = self._evict(keep=path)
+        # Outside the lock: the callback may do its own (slow) bookkeeping
+        if self.on_evict is not None:
+            for key in evicted:
+                try:
+                    self.on_evict(key)
+                except Exception as e:
+                    print(f"⚠️ Cache eviction callback failed for {key}: {e}")
+        return path
+
+    def _entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self, keep: str = None) -> list:
+        """Delete least recently used files until the folder fits max_bytes; returns their keys."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+                name = os.path.basename(path)
+                evicted.append(name[:len(name) - len(self.suffix)] if self.suffix else name)
+            except OSError:
+                pass
+        self._total_bytes = total
+        return evicted
+
+    def stats(self) -> dict:
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            return {
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+class TieredCache:
+    """An in-memory LRU tier in front of a DiskCache, storing JSON values."""
+
+    def __init__(self, name: str, max_entries: int, max_disk_bytes: int):
+        self.memory = LRUCache(max_entries)
+        self.disk = DiskCache(os.path.join(CACHE_ROOT, name), max_disk_bytes, suffix=".json")
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return value
+
+        data = self.disk.get_bytes(key)
+        if data is not None:
+            try:
+                value = json.loads(data.decode("utf-8"))
+            except ValueError:
+                value = None
+        if value is not None:
+            self.memory.put(key, value)
+            with self._lock:
+                self.disk_hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value):
+        self.memory.put(key, value)
+        try:
+            self.disk.put_bytes(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        except OSError as e:
+            print(f"⚠️ Could not write cache entry to disk: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            stats = {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self.memory),
+            }
+        stats.update({f"disk_{k}": v for k, v in self.disk.stats().items()})
+        return stats
+
+
+class FileCache:
+    """A DiskCache of generated files (images, audio) with hit/miss counters."""
+
+    def __init__(self, name: str, max_bytes: int, suffix: str = "", on_evict=None):
+        self.disk = DiskCache(os.path.join(CACHE_ROOT, name), max_bytes, suffix=suffix, on_evict=on_evict)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fetch(self, key: str, destination: str, count: bool = True) -> bool:
+        """Copy the cached file for key to destination; False on a miss (count=False skips the counters)."""
+        path = self.disk.get_path(key)
+        if path is not None:
+            try:
+                os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+                shutil.copyfile(path, destination)
+                if count:
+                    with self._lock:
+                        self.hits += 1
+                return True
+            except OSError:
+                pass
+        if count:
+            with self._lock:
+                self.misses += 1
+        return False
+
+    def store(self, key: str, source_path: str):
+        """Add a freshly generated file to the cache (errors are only logged)."""
+        try:
+            self.disk.put_file(key, source_path)
+        except OSError as e:
+            print(f"⚠️ Could not write cache entry to disk: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+        stats.update({f"disk_{k}": v for k, v in self.disk.stats().items()})
+        return stats
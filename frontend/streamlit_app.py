@@ -233,17 +233,21 @@ def main():
                         if result.get("images") and len(result["images"]) > 1:
                             st.header("🖼️ Story Image Sequence")
                             cols = st.columns(min(3, len(result["images"])))
+                            renditions = result.get("image_renditions") or []
                             for i, img_url in enumerate(result["images"]):
                                 with cols[i % 3]:
                                     if not img_url.startswith("Error"):
-                                        st.image(img_url, caption=f"Frame {i+1}")
+                                        # Thumbnails keep the gallery light; full size is in the video
+                                        thumb_url = renditions[i].get("thumb") if i < len(renditions) else None
+                                        st.image(thumb_url or img_url, caption=f"Frame {i+1}")
                         
                         # Display single image if available
                         elif result.get("image") and not result["image"].startswith("Error"):
                             st.header("🖼️ Story Illustration")
                             if result["image"].startswith("http"):
-                                # Use HTTP URL for display
-                                st.image(result["image"], caption="AI-generated illustration")
+                                # Use HTTP URL for display (mid-size preview when available)
+                                preview_url = (result.get("image_renditions") or {}).get("preview")
+                                st.image(preview_url or result["image"], caption="AI-generated illustration")
                             elif result.get("image_file") and os.path.exists(result["image_file"]):
                                 # Fallback to local file
                                 st.image(result["image_file"], caption="AI-generated illustration")
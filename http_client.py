@@ -0,0 +1,126 @@
+# http_client.py
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared outbound HTTP layer for images, translation and TTS: one pooled
+# keep-alive session per host, retries with exponential backoff, a total
+# deadline per call and streaming downloads straight to disk.
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_SECONDS = float(os.getenv("HTTP_BACKOFF_SECONDS", "0.5"))
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The call's total time budget ran out (across all attempts)."""
+
+
+class HTTPClient:
+    """Per-host pooled sessions with retry, deadline and streaming helpers."""
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, retries: int = HTTP_RETRIES,
+                 backoff_seconds: float = HTTP_BACKOFF_SECONDS):
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, url: str) -> requests.Session:
+        """The keep-alive session for url's host, created on first use."""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount(host, adapter)
+                self._sessions[host] = session
+            return session
+
+    def request(self, method: str, url: str, timeout: float = 30, deadline: float = None,
+                retries: int = None, idempotent: bool = None, **kwargs) -> requests.Response:
+        """
+        Send a request and return the response (raise_for_status already applied).
+        timeout bounds each attempt, deadline (seconds from now) bounds the whole
+        call. Idempotent calls are retried with exponential backoff on connection
+        errors, timeouts, 429 and 5xx; pass idempotent=True for safe POSTs.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + ((self.retries if retries is None else retries) if idempotent else 0)
+        expires = time.monotonic() + deadline if deadline is not None else None
+        session = self.session_for(url)
+
+        for attempt in range(attempts):
+            attempt_timeout = timeout
+            if expires is not None:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"Deadline of {deadline}s exceeded for {url}")
+                attempt_timeout = min(timeout, remaining)
+
+            try:
+                response = session.request(method, url, timeout=attempt_timeout, **kwargs)
+                if response.status_code in RETRY_STATUSES and attempt + 1 < attempts:
+                    response.close()
+                    raise requests.exceptions.HTTPError(f"{response.status_code} from {url}", response=response)
+                response.raise_for_status()
+                return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.HTTPError) as e:
+                status = getattr(e.response, "status_code", None) if isinstance(e, requests.exceptions.HTTPError) else None
+                retryable = status is None or status in RETRY_STATUSES
+                if not retryable or attempt + 1 >= attempts:
+                    raise
+                delay = self.backoff_seconds * 2 ** attempt * random.uniform(0.5, 1.5)
+                if expires is not None and time.monotonic() + delay >= expires:
+                    raise DeadlineExceeded(f"Deadline of {deadline}s exceeded for {url}") from e
+                print(f"🔁 Retrying {method} {urlsplit(url).netloc} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def download(self, url: str, path: str, method: str = "GET", deadline: float = None, **kwargs) -> str:
+        """
+        Stream a response body to path in chunks (never fully in memory).
+        Written to a temporary file first, so path is either complete or absent.
+        """
+        expires = time.monotonic() + deadline if deadline is not None else None
+        response = self.request(method, url, deadline=deadline, stream=True, **kwargs)
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.part"
+        written = 0
+        try:
+            with response, open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                    if expires is not None and time.monotonic() > expires:
+                        raise DeadlineExceeded(f"Deadline of {deadline}s exceeded downloading {url}")
+                    f.write(chunk)
+                    written += len(chunk)
+            if written == 0:
+                raise requests.exceptions.ContentDecodingError(f"Empty response body from {url}")
+            os.replace(tmp_path, path)
+            return path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+# The process-wide client every module shares
+http = HTTPClient()
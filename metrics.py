@@ -0,0 +1,269 @@
+# metrics.py
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Minimal Prometheus text-format metrics for the story pipeline, served by
+# /api/metrics. Stage latencies go into histograms labelled by stage.
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+RATE_BUCKETS = (1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0)
+
+_lock = threading.Lock()
+_metrics = {}
+_gauge_callbacks = []
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with _lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> list:
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with _lock:
+            self._values[_label_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> list:
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with _lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render(self) -> list:
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', bound),))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+def _register(metric):
+    with _lock:
+        return _metrics.setdefault(metric.name, metric)
+
+
+def counter(name: str, help_text: str) -> Counter:
+    return _register(Counter(name, help_text))
+
+
+def gauge(name: str, help_text: str) -> Gauge:
+    return _register(Gauge(name, help_text))
+
+
+def histogram(name: str, help_text: str, buckets=LATENCY_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help_text, buckets))
+
+
+def register_gauge_callback(name: str, help_text: str, callback, label: str = "key"):
+    """
+    Report callback() as a gauge at scrape time. It returns a number, or
+    {label_value: number} to emit one sample per value of `label`.
+    """
+    with _lock:
+        _gauge_callbacks.append((name, help_text, callback, label))
+
+
+# Per-stage pipeline metrics
+STAGE_REQUESTS = counter("storyteller_stage_requests_total", "Calls per pipeline stage")
+STAGE_ERRORS = counter("storyteller_stage_errors_total", "Failed calls per pipeline stage")
+STAGE_IN_FLIGHT = gauge("storyteller_stage_in_flight", "Calls currently running per pipeline stage")
+STAGE_DURATION = histogram("storyteller_stage_duration_seconds", "Latency per pipeline stage")
+
+# LLM generation metrics
+LLM_TIME_TO_FIRST_TOKEN = histogram(
+    "storyteller_llm_time_to_first_token_seconds", "Request start (including queueing) to first token"
+)
+LLM_PROMPT_EVAL = histogram(
+    "storyteller_llm_prompt_eval_seconds", "Model start to first token (prompt evaluation)"
+)
+LLM_DECODE = histogram("storyteller_llm_decode_seconds", "First token to end of generation")
+LLM_TOKENS = counter("storyteller_llm_generated_tokens_total", "Tokens generated by the story model")
+LLM_TOKENS_PER_SECOND = histogram(
+    "storyteller_llm_decode_tokens_per_second", "Decode speed per generation", buckets=RATE_BUCKETS
+)
+
+
+class _StageCall:
+    def __init__(self):
+        self.failed = False
+
+    def fail(self):
+        """Count this call as an error even though no exception was raised."""
+        self.failed = True
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Time a pipeline stage; exceptions (or call.fail()) count as errors."""
+    call = _StageCall()
+    STAGE_REQUESTS.inc(stage=stage)
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call.failed = True
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - started, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+        if call.failed:
+            STAGE_ERRORS.inc(stage=stage)
+
+
+def instrument_stage(stage: str):
+    """
+    Decorator form of track_stage. Return values starting with "Error"
+    (or tuples whose first item does) count as failures, matching how
+    pipeline functions report errors.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_stage(stage) as call:
+                result = func(*args, **kwargs)
+                value = result[0] if isinstance(result, tuple) and result else result
+                if isinstance(value, str) and value.startswith("Error"):
+                    call.fail()
+                return result
+        return wrapper
+    return decorator
+
+
+def render() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        metrics = list(_metrics.values())
+        callbacks = list(_gauge_callbacks)
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+
+    # Error ratio per stage, derived at scrape time
+    lines.append("# HELP storyteller_stage_error_ratio Failed calls / all calls per stage")
+    lines.append("# TYPE storyteller_stage_error_ratio gauge")
+    with _lock:
+        requests = dict(STAGE_REQUESTS._values)
+        errors = dict(STAGE_ERRORS._values)
+    for key, total in requests.items():
+        ratio = errors.get(key, 0.0) / total if total else 0.0
+        lines.append(f"storyteller_stage_error_ratio{_format_labels(key)} {round(ratio, 4)}")
+
+    for name, help_text, callback, label in callbacks:
+        try:
+            value = callback()
+        except Exception as e:
+            print(f"⚠️ Metrics callback {name} failed: {e}")
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        if isinstance(value, dict):
+            for label_value, number in value.items():
+                lines.append(f"{name}{_format_labels(((label, label_value),))} {float(number)}")
+        else:
+            lines.append(f"{name} {float(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+class GenerationTimer:
+    """
+    Splits one LLM generation into queueing, prompt evaluation (model start to
+    first token) and decode (first token to end), and records tokens/sec.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.model_started = None
+        self.first_token = None
+        self.tokens = 0
+
+    def model_start(self):
+        """Call when the model begins evaluating the prompt (after any queueing)."""
+        if self.model_started is None:
+            self.model_started = time.perf_counter()
+
+    def token(self):
+        self.tokens += 1
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def finish(self):
+        ended = time.perf_counter()
+        LLM_TOKENS.inc(self.tokens)
+        if self.first_token is None:
+            return
+        LLM_TIME_TO_FIRST_TOKEN.observe(self.first_token - self.started)
+        LLM_PROMPT_EVAL.observe(self.first_token - (self.model_started or self.started))
+        decode_seconds = ended - self.first_token
+        LLM_DECODE.observe(decode_seconds)
+        if self.tokens > 1 and decode_seconds > 0:
+            LLM_TOKENS_PER_SECOND.observe((self.tokens - 1) / decode_seconds)
@@ -0,0 +1,365 @@
+# models/batch_engine.py
+import codecs
+import ctypes
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from models.prompt_prefix import ORCA_SYSTEM_TEMPLATE, ORCA_USER_TEMPLATE
+
+# Sequence 0 holds the evaluated system prompt; requests copy it into their own slot
+PREFIX_SEQ_ID = 0
+
+
+class LlamaCppBackend:
+    """
+    Multi-sequence decoding on llama.cpp through llama-cpp-python.
+    One context holds the KV cache of every active sequence, so a single
+    llama_decode call advances all of them together.
+    """
+
+    def __init__(self, model_path: str, max_sequences: int = 8, seq_ctx: int = 768, n_batch: int = 512):
+        import llama_cpp
+
+        self._llama_cpp = llama_cpp
+        self.max_sequences = max_sequences
+        self.seq_ctx = seq_ctx
+        self.n_batch = n_batch
+
+        # The Llama object gives us the weights plus a stable tokenizer API;
+        # its own context is kept tiny because decoding uses the one below.
+        self._llm = llama_cpp.Llama(model_path=model_path, n_ctx=256, verbose=False)
+
+        params = llama_cpp.llama_context_default_params()
+        params.n_ctx = seq_ctx * (max_sequences + 1)
+        params.n_batch = n_batch
+        if hasattr(params, "n_ubatch"):
+            params.n_ubatch = n_batch
+        if hasattr(params, "n_seq_max"):
+            params.n_seq_max = max_sequences + 1
+        self._ctx = llama_cpp.llama_new_context_with_model(self._llm.model, params)
+        if not self._ctx:
+            raise RuntimeError("llama.cpp could not create the batched decoding context")
+
+        self._batch = llama_cpp.llama_batch_init(n_batch, 0, max_sequences + 1)
+        self.n_vocab = self._llm.n_vocab()
+        self.eos_token = self._llm.token_eos()
+
+    def tokenize(self, text: str, add_bos: bool) -> list:
+        return self._llm.tokenize(text.encode("utf-8"), add_bos=add_bos, special=True)
+
+    def token_bytes(self, token: int) -> bytes:
+        return self._llm.detokenize([token])
+
+    def decode(self, entries: list) -> dict:
+        """
+        Evaluate one batch. entries are (token, pos, seq_id, want_logits) tuples.
+        Returns {entry_index: logits} for entries that asked for logits.
+        """
+        batch = self._batch
+        batch.n_tokens = len(entries)
+        for i, (token, pos, seq_id, want_logits) in enumerate(entries):
+            batch.token[i] = token
+            batch.pos[i] = pos
+            batch.n_seq_id[i] = 1
+            batch.seq_id[i][0] = seq_id
+            batch.logits[i] = want_logits
+
+        result = self._llama_cpp.llama_decode(self._ctx, batch)
+        if result != 0:
+            raise RuntimeError(f"llama_decode failed with code {result}")
+
+        logits = {}
+        for i, entry in enumerate(entries):
+            if entry[3]:
+                row = self._llama_cpp.llama_get_logits_ith(self._ctx, i)
+                row = ctypes.cast(row, ctypes.POINTER(ctypes.c_float))
+                logits[i] = np.ctypeslib.as_array(row, shape=(self.n_vocab,)).copy()
+        return logits
+
+    def _memory_call(self, operation: str, *args):
+        # The KV cache functions were renamed a few times across llama.cpp releases
+        lib = self._llama_cpp
+        for name in (f"llama_kv_cache_{operation}", f"llama_kv_self_{operation}"):
+            func = getattr(lib, name, None)
+            if func is not None:
+                return func(self._ctx, *args)
+        func = getattr(lib, f"llama_memory_{operation}")
+        return func(lib.llama_get_memory(self._ctx), *args)
+
+    def copy_sequence(self, src: int, dst: int, length: int):
+        self._memory_call("seq_cp", src, dst, 0, length)
+
+    def remove_sequence(self, seq_id: int):
+        self._memory_call("seq_rm", seq_id, -1, -1)
+
+    def truncate_sequence(self, seq_id: int, length: int):
+        """Drop the KV cells of a sequence from position length on."""
+        self._memory_call("seq_rm", seq_id, length, -1)
+
+
+def sample_token(logits, sampling: dict, rng, recent_tokens) -> int:
+    """Repeat penalty, temperature, top-k and top-p sampling over one logits row."""
+    logits = logits.astype(np.float64)
+
+    penalty = sampling.get("repeat_penalty", 1.0)
+    if penalty != 1.0 and recent_tokens:
+        seen = np.fromiter(set(recent_tokens), dtype=np.int64)
+        values = logits[seen]
+        logits[seen] = np.where(values > 0, values / penalty, values * penalty)
+
+    temp = sampling.get("temp", 0.0)
+    if temp <= 0:
+        return int(np.argmax(logits))
+
+    top_k = min(int(sampling.get("top_k", 40)) or len(logits), len(logits))
+    candidates = np.argpartition(-logits, top_k - 1)[:top_k]
+    scores = logits[candidates] / temp
+    order = np.argsort(-scores)
+    candidates, scores = candidates[order], scores[order]
+
+    probs = np.exp(scores - scores[0])
+    probs /= probs.sum()
+    top_p = sampling.get("top_p", 1.0)
+    if top_p < 1.0:
+        keep = int(np.searchsorted(np.cumsum(probs), top_p)) + 1
+        candidates, probs = candidates[:keep], probs[:keep] / probs[:keep].sum()
+
+    return int(candidates[min(np.searchsorted(np.cumsum(probs), rng.random()), len(candidates) - 1)])
+
+
+class _Sequence:
+    """State of one request inside the batch."""
+
+    def __init__(self, prompt_tokens, max_tokens, sampling, on_token, seed):
+        self.pending_tokens = deque(prompt_tokens)
+        self.max_tokens = max_tokens
+        self.sampling = sampling
+        self.on_token = on_token
+        self.rng = np.random.default_rng(seed)
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self.seq_id = None
+        self.n_past = 0
+        self.next_token = None
+        self.generated = []
+        self.text_parts = []
+        self.error = None
+        self.finished = threading.Event()
+        self.submitted_at = time.perf_counter()
+        self.first_token_at = None
+
+
+class ContinuousBatchEngine:
+    """
+    Decodes many story requests together in one background loop.
+
+    Each step packs one token for every generating sequence plus prompt
+    tokens of newly joined requests into a single batch. Requests join as
+    soon as a sequence slot is free and leave the moment they finish, so
+    the batch never waits for its slowest member.
+    """
+
+    def __init__(self, backend_factory, system_prompt: str, max_sequences: int = 8, repeat_last_n: int = 64):
+        self._backend_factory = backend_factory
+        self._system_prompt = system_prompt
+        self.max_sequences = max_sequences
+        self.repeat_last_n = repeat_last_n
+
+        self._backend = None
+        self._prefix_len = 0
+        self._pending = deque()
+        self._active = []
+        self._free_ids = deque(range(1, max_sequences + 1))
+        self._cond = threading.Condition()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self._steps = 0
+        self._batched_tokens = 0
+        self._generated_tokens = 0
+        self._decode_seconds = 0.0
+        self._completed = 0
+
+    def start(self):
+        """Load the backend, evaluate the shared system prompt and start the decode loop."""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            backend = self._backend_factory()
+            prefix_tokens = backend.tokenize(ORCA_SYSTEM_TEMPLATE.format(self._system_prompt), add_bos=True)
+            for start in range(0, len(prefix_tokens), backend.n_batch):
+                chunk = prefix_tokens[start:start + backend.n_batch]
+                backend.decode([
+                    (token, start + i, PREFIX_SEQ_ID, False) for i, token in enumerate(chunk)
+                ])
+            self._backend = backend
+            self._prefix_len = len(prefix_tokens)
+            self._thread = threading.Thread(target=self._loop, name="story-batch-engine", daemon=True)
+            self._thread.start()
+
+    def generate(self, prompt: str, max_tokens: int, sampling: dict, on_token=None, seed: int = None) -> str:
+        """
+        Generate a response to prompt; blocks until this request leaves the batch.
+        on_token(text) returning False stops this request early.
+        Raises ValueError when the prompt does not fit in one sequence's
+        context; max_tokens is lowered to the room left after the prompt.
+        """
+        self.start()
+        user_tokens = self._backend.tokenize(ORCA_USER_TEMPLATE.replace("%1", prompt), add_bos=False)
+        room = self._backend.seq_ctx - self._prefix_len - len(user_tokens)
+        if room <= 0:
+            # Checked here, before queuing: an oversized prompt must not reach
+            # the shared batch, where a failed decode would hit everyone
+            raise ValueError(
+                f"Prompt too long: {len(user_tokens)} tokens, at most "
+                f"{self._backend.seq_ctx - self._prefix_len - 1} fit"
+            )
+        max_tokens = min(max_tokens, room)
+        sequence = _Sequence(user_tokens, max_tokens, sampling, on_token, seed)
+
+        with self._cond:
+            self._pending.append(sequence)
+            self._cond.notify()
+
+        sequence.finished.wait()
+        if sequence.error is not None:
+            raise sequence.error
+        return "".join(sequence.text_parts)
+
+    def _admit_pending(self):
+        """Move waiting requests into free sequence slots (called with the lock held)."""
+        while self._pending and self._free_ids:
+            sequence = self._pending.popleft()
+            sequence.seq_id = self._free_ids.popleft()
+            self._backend.copy_sequence(PREFIX_SEQ_ID, sequence.seq_id, self._prefix_len)
+            sequence.n_past = self._prefix_len
+            self._active.append(sequence)
+
+    def _build_batch(self):
+        """
+        One token per generating sequence, then prompt tokens up to n_batch.
+        Returns (entries, owners, n_generating); the first n_generating
+        entries are the generated tokens.
+        """
+        entries, owners = [], []
+        capacity = self._backend.n_batch
+
+        for sequence in self._active:
+            if sequence.next_token is not None and len(entries) < capacity:
+                entries.append((sequence.next_token, sequence.n_past, sequence.seq_id, True))
+                owners.append(sequence)
+                sequence.next_token = None
+                sequence.n_past += 1
+        n_generating = len(entries)
+
+        for sequence in self._active:
+            while sequence.pending_tokens and len(entries) < capacity:
+                token = sequence.pending_tokens.popleft()
+                last = not sequence.pending_tokens
+                entries.append((token, sequence.n_past, sequence.seq_id, last))
+                owners.append(sequence)
+                sequence.n_past += 1
+        return entries, owners, n_generating
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                self._admit_pending()
+                while not self._active:
+                    self._cond.wait()
+                    self._admit_pending()
+
+            entries, owners, n_generating = self._build_batch()
+            started = time.perf_counter()
+            try:
+                logits = self._backend.decode(entries)
+            except Exception as e:
+                self._fail_batch(entries, owners, n_generating, e)
+                continue
+
+            self._steps += 1
+            self._batched_tokens += len(entries)
+            self._decode_seconds += time.perf_counter() - started
+
+            for index, row in logits.items():
+                self._advance(owners[index], row)
+
+    def _fail_batch(self, entries, owners, n_generating, error):
+        """
+        Handle a failed decode. Prompt tokens are what can overflow the KV
+        cache, so only the sequences that had prompt tokens in the batch fail
+        (all of them if it had none). The others are rolled back and decode
+        their token again in the next step.
+        """
+        culprits = {id(sequence): sequence for sequence in owners[n_generating:]}
+        if not culprits:
+            culprits = {id(sequence): sequence for sequence in self._active}
+        print(f"⚠️ Batch decode failed, ending {len(culprits)} sequence(s): {error}")
+        for sequence in culprits.values():
+            sequence.error = error
+            self._finish(sequence)
+
+        for (token, pos, seq_id, _), sequence in zip(entries[:n_generating], owners[:n_generating]):
+            if id(sequence) not in culprits:
+                sequence.next_token = token
+                sequence.n_past = pos
+                self._backend.truncate_sequence(seq_id, pos)
+
+    def _advance(self, sequence, logits_row):
+        """Sample the next token for a sequence and decide whether it leaves the batch."""
+        token = sample_token(
+            logits_row,
+            sequence.sampling,
+            sequence.rng,
+            sequence.generated[-self.repeat_last_n:],
+        )
+        if token == self._backend.eos_token:
+            self._finish(sequence)
+            return
+
+        sequence.generated.append(token)
+        text = sequence.decoder.decode(self._backend.token_bytes(token))
+        sequence.text_parts.append(text)
+        self._generated_tokens += 1
+        if sequence.first_token_at is None:
+            sequence.first_token_at = time.perf_counter()
+
+        keep_going = True
+        if sequence.on_token is not None and text:
+            try:
+                keep_going = sequence.on_token(text) is not False
+            except Exception as e:
+                sequence.error = e
+                keep_going = False
+
+        out_of_context = sequence.n_past + 1 >= self._backend.seq_ctx
+        if not keep_going or out_of_context or len(sequence.generated) >= sequence.max_tokens:
+            self._finish(sequence)
+        else:
+            sequence.next_token = token
+
+    def _finish(self, sequence):
+        """Release the sequence slot and wake up the waiting request thread."""
+        self._backend.remove_sequence(sequence.seq_id)
+        with self._cond:
+            self._active.remove(sequence)
+            self._free_ids.append(sequence.seq_id)
+            self._completed += 1
+        sequence.finished.set()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "engine": "continuous-batching",
+                "running": self._thread is not None,
+                "active_sequences": len(self._active),
+                "queue_depth": len(self._pending),
+                "max_sequences": self.max_sequences,
+                "completed": self._completed,
+                "decode_steps": self._steps,
+                "avg_batch_tokens": round(self._batched_tokens / self._steps, 2) if self._steps else 0.0,
+                "generated_tokens": self._generated_tokens,
+                "tokens_per_second": round(self._generated_tokens / self._decode_seconds, 2) if self._decode_seconds else 0.0,
+            }
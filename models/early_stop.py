@@ -0,0 +1,98 @@
+# models/early_stop.py
+import re
+import threading
+from models.text_segmenter import sentence_end_offsets
+
+# The model sometimes starts a new chat turn after the story; nothing after
+# one of these markers belongs to the story.
+JUNK_MARKERS = ("### user", "### system", "### human", "### response", "assistant:", "user:")
+
+_PARAGRAPH_BREAK = re.compile(r'\S\s*\n\s*\n')
+
+
+class StoryStopper:
+    """
+    Token callback that stops generation once the story is structurally done:
+    max_paragraphs complete paragraphs, max_sentences complete sentences, or
+    the start of a junk chat turn. text() returns the story without the junk.
+    """
+
+    def __init__(self, max_paragraphs: int = 4, max_sentences: int = 12):
+        self.max_paragraphs = max_paragraphs
+        self.max_sentences = max_sentences
+        self.tokens = 0
+        self.reason = None
+        self._parts = []
+        self._text = ""
+        self._lowered = ""
+
+    def __call__(self, token: str) -> bool:
+        self.tokens += 1
+        self._parts.append(token)
+        self._text = "".join(self._parts)
+        self._lowered = self._text.lower()
+
+        for marker in JUNK_MARKERS:
+            position = self._lowered.find(marker)
+            if position == -1:
+                continue
+            if not self._text[:position].strip():
+                # A role prefix before any story text: drop it and keep going
+                self._parts = [self._text[position + len(marker):]]
+                self._text = self._parts[0]
+                self._lowered = self._text.lower()
+                continue
+            self._text = self._text[:position]
+            self.reason = "junk"
+            return False
+
+        if self.max_paragraphs:
+            breaks = [match.start() + 1 for match in _PARAGRAPH_BREAK.finditer(self._text)]
+            if len(breaks) >= self.max_paragraphs:
+                # Keep whole paragraphs only, not the start of the next one
+                self._text = self._text[:breaks[self.max_paragraphs - 1]]
+                self.reason = "paragraphs"
+                return False
+
+        if self.max_sentences:
+            ends = sentence_end_offsets(self._text)
+            if len(ends) >= self.max_sentences:
+                self._text = self._text[:ends[self.max_sentences - 1]]
+                self.reason = "sentences"
+                return False
+
+        return True
+
+    def text(self) -> str:
+        return self._text
+
+
+class EarlyStopStats:
+    """Thread-safe counters for how much generation early stopping saved."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.generations = 0
+        self.tokens_generated = 0
+        self.tokens_saved = 0
+        self.stops = {"junk": 0, "paragraphs": 0, "sentences": 0}
+
+    def record(self, stopper: StoryStopper, max_tokens: int):
+        with self._lock:
+            self.generations += 1
+            self.tokens_generated += stopper.tokens
+            if stopper.reason is not None:
+                self.stops[stopper.reason] += 1
+                self.tokens_saved += max(0, max_tokens - stopper.tokens)
+
+    def stats(self) -> dict:
+        with self._lock:
+            budget = self.tokens_generated + self.tokens_saved
+            return {
+                "generations": self.generations,
+                "early_stops": dict(self.stops),
+                "tokens_generated": self.tokens_generated,
+                "tokens_saved": self.tokens_saved,
+                "avg_tokens_saved": round(self.tokens_saved / self.generations, 1) if self.generations else 0.0,
+                "saved_fraction": round(self.tokens_saved / budget, 3) if budget else 0.0,
+            }
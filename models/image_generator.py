@@ -3,27 +3,96 @@ import requests
 import os
 from urllib.parse import quote
 import re
-import nltk
-
-# Ensure tokenizers are downloaded
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-
-try:
-    nltk.data.find('tokenizers/punkt_tab')
-except LookupError:
-    nltk.download('punkt_tab')
-
-
-
-def generate_image(prompt: str, filename="story_image.png", style="fantasy", width=512, height=512) -> str:
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from models.text_segmenter import split_sentences
+from metrics import instrument_stage
+from http_client import http
+from caching import CACHE_ROOT, FileCache, make_cache_key
+from models.image_renditions import create_renditions
+from models.scene_planner import plan_scenes
+from models.prompt_index import PromptIndex
+from models.placeholder_frames import render_placeholder_frame
+
+# Pollinations can take minutes under load; IMAGE_DEADLINE bounds all retries
+IMAGE_REQUEST_TIMEOUT = float(os.getenv("IMAGE_REQUEST_TIMEOUT", "120"))
+IMAGE_DEADLINE = float(os.getenv("IMAGE_DEADLINE", "200"))
+
+# Images are cached on (prompt, style, size, seed). By default Pollinations
+# picks a random seed, so every request gets a fresh image (not cached), as
+# before. With IMAGE_DETERMINISTIC_SEEDS=1 the same prompt always maps to the
+# same image, so repeated scenes and regenerated videos skip the network.
+IMAGE_DETERMINISTIC_SEEDS = os.getenv("IMAGE_DETERMINISTIC_SEEDS", "0") == "1"
+image_cache = FileCache(
+    "images",
+    max_bytes=int(os.getenv("IMAGE_CACHE_MAX_MB", "500")) * 1024 * 1024,
+    suffix=".img",
+    # Evicted images leave the prompt index too, so it stays as small as the cache
+    on_evict=lambda key: prompt_index.remove(key),
+)
+
+# Prompts that differ only slightly from an earlier one (same style and size,
+# token-set similarity >= IMAGE_SIMILARITY_THRESHOLD) reuse its cached image
+# instead of calling Pollinations. IMAGE_STRICT_PROMPTS=1 turns this off so
+# only exact prompt matches are served from the cache.
+IMAGE_STRICT_PROMPTS = os.getenv("IMAGE_STRICT_PROMPTS", "0") == "1"
+prompt_index = PromptIndex(
+    os.path.join(CACHE_ROOT, "image_prompts.sqlite3"),
+    threshold=float(os.getenv("IMAGE_SIMILARITY_THRESHOLD", "0.8")),
+)
+
+# Scene images are fetched in parallel; IMAGE_CONCURRENCY caps requests in
+# flight across all stories, VIDEO_FRAMES_DEADLINE caps one story's image stage
+IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", "4"))
+VIDEO_FRAMES_DEADLINE = float(os.getenv("VIDEO_FRAMES_DEADLINE", "300"))
+# Scenes whose image fails or misses the deadline get a locally drawn
+# placeholder frame instead (VIDEO_PLACEHOLDER_FRAMES=0 leaves them out)
+VIDEO_PLACEHOLDER_FRAMES = os.getenv("VIDEO_PLACEHOLDER_FRAMES", "1") != "0"
+_image_executor = ThreadPoolExecutor(max_workers=IMAGE_CONCURRENCY, thread_name_prefix="scene-image")
+
+
+
+def image_seed(prompt: str, style: str, width: int, height: int) -> int:
+    """A stable Pollinations seed derived from everything that describes the image."""
+    return int(make_cache_key("image-seed", prompt, style, width, height)[:8], 16) % 2**31
+
+
+@instrument_stage("generate_image")
+def generate_image(prompt: str, filename="story_image.png", style="fantasy", width=512, height=512,
+                   deadline: float = None, seed: int = None) -> str:
     """
     Generate image using Pollinations.ai API - free and lightweight.
     No heavy models needed, perfect for low-spec machines.
+    deadline (seconds) can shorten the default IMAGE_DEADLINE. Without a seed,
+    IMAGE_DETERMINISTIC_SEEDS derives one from the prompt; seeded images are
+    served from the image cache when possible, and unless IMAGE_STRICT_PROMPTS
+    is set, so are images of near-identical prompts.
     """
     try:
+        # Only derived seeds may reuse a similar prompt's image; an explicit
+        # seed asks for one specific image
+        reuse_similar = seed is None and IMAGE_DETERMINISTIC_SEEDS and not IMAGE_STRICT_PROMPTS
+        if seed is None and IMAGE_DETERMINISTIC_SEEDS:
+            seed = image_seed(prompt, style, width, height)
+
+        cache_key = None
+        group = f"{style}|{width}x{height}"
+        if seed is not None and seed >= 0:
+            cache_key = make_cache_key("image", prompt, style, width, height, seed)
+            if image_cache.fetch(cache_key, filename):
+                print(f"📦 Image cache hit: {os.path.basename(filename)}")
+                return filename
+
+        if reuse_similar:
+            similar_key = prompt_index.find(prompt, group)
+            if similar_key is not None:
+                # Counted by the prompt index, not as an exact cache hit
+                if image_cache.fetch(similar_key, filename, count=False):
+                    print(f"♻️ Reusing image of a similar prompt: {os.path.basename(filename)}")
+                    return filename
+                # Evicted from the image cache since it was indexed
+                prompt_index.remove(similar_key)
+
         # Clean and enhance the prompt for better image generation
         enhanced_prompt = f"{prompt}, {style} art style, detailed, high quality"
         
@@ -31,24 +100,17 @@ def generate_image(prompt: str, filename="story_image.png", style="fantasy", wid
         encoded_prompt = quote(enhanced_prompt)
         
         # Pollinations.ai API endpoint
-        api_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width={width}&height={height}&seed=-1"
+        api_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width={width}&height={height}&seed={seed if seed is not None else -1}"
         print(f"🖼️  Pollinations request: {api_url[:200]}...")  # Log first 200 chars of URL
 
-        response = requests.get(api_url, timeout=60)
-
-        # Log HTTP response for debugging
-        print(f"🔍 Pollinations status: {response.status_code}")
-
+        # One streamed request, written straight to disk (retried on network errors)
+        budget = IMAGE_DEADLINE if deadline is None else min(deadline, IMAGE_DEADLINE)
+        http.download(api_url, filename, timeout=IMAGE_REQUEST_TIMEOUT, deadline=budget)
 
-
-        # Make request to generate image
-        response = requests.get(api_url, timeout=200)
-        response.raise_for_status()
-        
-        # Save the image
-        with open(filename, 'wb') as f:
-            f.write(response.content)
-        
+        if cache_key is not None:
+            image_cache.store(cache_key, filename)
+            if IMAGE_DETERMINISTIC_SEEDS:
+                prompt_index.add(prompt, group, cache_key)
         return filename
         
     except requests.exceptions.RequestException as e:
@@ -56,6 +118,13 @@ def generate_image(prompt: str, filename="story_image.png", style="fantasy", wid
     except Exception as e:
         return f"Error generating image: {e}"
 
+
+def get_image_cache_stats() -> dict:
+    """Hit/miss counters and disk usage of the image cache, plus similar-prompt reuse."""
+    stats = image_cache.stats()
+    stats["similar_prompts"] = {"enabled": False} if IMAGE_STRICT_PROMPTS else prompt_index.stats()
+    return stats
+
 def generate_cultural_image(story_text: str, culture: str = None, filename="cultural_story_image.png") -> str:
     """
     Generate culturally appropriate image based on story content.
@@ -138,11 +207,70 @@ def generate_themed_image(theme: str, culture: str = None, filename="themed_imag
 
 
 
+def _scene_filename(i: int, work_dir: str, placeholder: bool = False) -> str:
+    # Placeholders get their own file: a late fetch may still write scene_NN.png
+    # while the video (and renditions) are built from the placeholder
+    suffix = ".placeholder" if placeholder else ""
+    return os.path.join(work_dir, f"scene_{i+1:02d}{suffix}.png")
+
+
+def _placeholder_scene(i: int, scene: str, work_dir: str):
+    """Draw the local placeholder frame for a scene; returns its path or None."""
+    if not VIDEO_PLACEHOLDER_FRAMES:
+        return None
+    try:
+        filename = render_placeholder_frame(_scene_filename(i, work_dir, placeholder=True), scene, index=i)
+    except Exception as e:
+        print(f"❌ Could not draw placeholder for scene {i+1}: {e}")
+        return None
+    create_renditions(filename)
+    return filename
+
+
+def _render_scene(i: int, scene: str, num_scenes: int, culture: str, expires: float, work_dir: str = "static"):
+    """Fetch one scene image (placeholder on failure) before expires; returns its path or None."""
+    filename = _scene_filename(i, work_dir)
+
+    # Enhance scene with cultural + visual details
+    scene_prompt =f"Scene {i+1}: {sanitize_prompt(scene)}. Cultural theme: Indian, art style: storybook illustration, high quality."
+
+    print(f"🎨 Generating image {i+1}/{num_scenes}: {scene_prompt[:80]}...")
+
+    remaining = expires - time.monotonic()
+    if remaining <= 0:
+        return _placeholder_scene(i, scene, work_dir)
+    result = generate_image(
+        prompt=scene_prompt,
+        filename=filename,
+        style="storybook illustration",
+        width=1280,
+        height=720,
+        deadline=remaining
+    )
+
+    if not result.startswith("Error") and os.path.exists(result):
+        print(f"✅ Scene {i+1} image generated successfully")
+        create_renditions(result)
+        return result
+
+    # A second remote request could double the wait; a local frame takes milliseconds
+    print(f"⚠️ Failed to generate scene {i+1}, using placeholder frame")
+    return _placeholder_scene(i, scene, work_dir)
+
+
+def plan_story_scenes(story_text: str) -> dict:
+    """Clean a story, split it into sentences and group them into video scenes (see plan_scenes)."""
+    sentences = split_story_into_scenes(clean_story_text(story_text))
+    return plan_scenes(sentences, time_budget=VIDEO_FRAMES_DEADLINE, concurrency=IMAGE_CONCURRENCY)
+
+
 #  GEnerate story video frames
-def generate_video_frames(story_text: str, culture: str = None) -> dict:
+def generate_video_frames(story_text: str, culture: str = None, work_dir: str = "static", plan: dict = None) -> dict:
     """
     Generate scene-wise images from story text for video creation.
     Each scene becomes a frame with culturally relevant illustration prompts.
+    Frames are written to work_dir (the job's workspace). plan, from
+    plan_story_scenes, reuses a scene plan the caller already made.
     """
 
     # print(story_text)
@@ -150,64 +278,51 @@ def generate_video_frames(story_text: str, culture: str = None) -> dict:
     try:
         print(f"🔍 Generating video frames for story... {story_text[:200]}")  # slice for long stories
 
-        story_text = clean_story_text(story_text)
-
-         # Step 1: Split story into logical scenes
-        scenes = split_story_into_scenes(story_text)
-        if not scenes:
+         # Step 1: Split story into sentences and group them into a capped number of scenes
+        if plan is None:
+            plan = plan_story_scenes(story_text)
+        if not plan["scenes"]:
             return {"error": "No scenes could be generated"}
 
-        print(f"🧩 {len(scenes)} scenes detected")
+        scenes = plan["scenes"]
+        frame_durations = plan["durations"]
+        print(f"🧩 {len(scenes)} scenes planned")
 
 
-        # Step 2: Build culturally enriched prompts
+        # Step 2: Build culturally enriched prompts and fetch all scenes in parallel
         image_files = []
-        frame_durations = []
-        words_per_second = 2.0  
-        for i, scene in enumerate(scenes):
-            filename = f"static/scene_{i+1:02d}.png"
-
-            # Enhance scene with cultural + visual details
-            # scene_prompt = (
-            #     f"Scene {i+1}: {scene}. "
-            #     f"A detailed storybook illustration, "
-            #     f"rich colors, cinematic lighting, 16:9 aspect ratio, high quality digital art."
-            # )
-
-            scene_prompt =f"Scene {i+1}: {sanitize_prompt(scene)}. Cultural theme: Indian, art style: storybook illustration, high quality."
-
-            print(f"🎨 Generating image {i+1}/{len(scenes)}: {scene_prompt[:80]}...")
-
-            result = generate_image(
-                prompt=scene_prompt,
-                filename=filename,
-                style="storybook illustration",
-                width=1280,
-                height=720
-            )
-
-            if not result.startswith("Error") and os.path.exists(result):
+        image_durations = []
+        expires = time.monotonic() + VIDEO_FRAMES_DEADLINE
+        futures = [
+            _image_executor.submit(_render_scene, i, scene, len(scenes), culture, expires, work_dir)
+            for i, scene in enumerate(scenes)
+        ]
+        done, not_done = wait(futures, timeout=VIDEO_FRAMES_DEADLINE)
+        for future in not_done:
+            future.cancel()
+        if not_done:
+            print(f"⏰ {len(not_done)} scene images missed the {VIDEO_FRAMES_DEADLINE:.0f}s deadline, using placeholders")
+        results = [
+            future.result() if future in done else _placeholder_scene(i, scene, work_dir)
+            for i, (future, scene) in enumerate(zip(futures, scenes))
+        ]
+
+        # Keep scene order; a scene without an image hands its screen time to
+        # the previous image (or the next one, at the start) so no narration is lost
+        carry = 0.0
+        for result, duration in zip(results, frame_durations):
+            if result is not None:
                 image_files.append(result)
-                print("===============================================")
-                print(f"✅ Scene {i+1} image generated successfully")
+                image_durations.append(duration + carry)
+                carry = 0.0
+            elif image_durations:
+                image_durations[-1] += duration
             else:
-                print(f"⚠️ Failed to generate scene {i+1}, using fallback")
-                fallback_prompt = f"Generic cultural illustration {culture if culture else ''}"
-                fallback_result = generate_image(fallback_prompt, filename, style="simple illustration")
-                if not fallback_result.startswith("Error") and os.path.exists(fallback_result):
-                    image_files.append(fallback_result)
+                carry += duration
 
         for i, s in enumerate(scenes):
             print(f"Scene {i+1}:", s)    
 
-        # Step 3: Timing (longer per frame since images are richer)
-        for i, scene in enumerate(scenes):
-            # generate image ...
-            # calculate frame duration for this scene
-            word_count = len(scene.split())
-            frame_time = max(3.0, word_count / words_per_second)
-            frame_durations.append(frame_time)
-
          # Step 3: Compute total duration
         total_duration = sum(frame_durations)
 
@@ -217,8 +332,12 @@ def generate_video_frames(story_text: str, culture: str = None) -> dict:
         return {
             "images": image_files,
             "frame_durations": frame_durations,
+            # One duration per image in "images" (missing scenes folded into neighbours)
+            "image_durations": image_durations,
             "total_duration": total_duration,
             "num_frames": len(image_files),
+            # Thumbnail/preview paths per image (already written by the scene workers)
+            "renditions": [create_renditions(img) for img in image_files],
             "culture": culture,
             "story_scenes": scenes
         }
@@ -256,24 +375,15 @@ def split_story_into_scenes(story_text):
         print("❌ Warning: Empty or None story_text passed to split_story_into_scenes")
         return []
 
-    # Ensure sentence tokenizer available
-    nltk.download('punkt', quiet=True)
-    nltk.download('punkt_tab', quiet=True)
-
     story_text = story_text.strip()
 
-    # Step 1: Split into sentences (works for most languages)
-    sentences = nltk.sent_tokenize(story_text)
+    # Split into sentences (English and Hindi, no tokenizer downloads)
+    sentences = split_sentences(story_text)
 
-    # Step 2: Clean up and filter
+    # Clean up and filter
     scenes = [s.strip() for s in sentences if len(s.strip()) > 3]
 
-    # Step 3: Optional fallback if tokenizer fails (Hindi or mixed text)
-    if len(scenes) <= 1:
-        scenes = re.split(r'(?<=[।.!?])\s+', story_text)
-        scenes = [s.strip() for s in scenes if len(s.strip()) > 3]
-
-    print(f"🎞️ Story split into {len(scenes)} scenes (one per sentence).")
+    print(f"🎞️ Story split into {len(scenes)} sentences.")
     return scenes
 
 
@@ -0,0 +1,71 @@
+# models/image_renditions.py
+import os
+import threading
+from PIL import Image, features
+from metrics import track_stage
+
+# Generated images are 1280x720 PNGs; galleries only need a fraction of that.
+# Every image gets a small thumbnail and a mid-size preview, written next to
+# the original (scene_01.png -> scene_01.thumb.webp, scene_01.preview.webp)
+# and reused while they are newer than the original.
+IMAGE_RENDITION_FORMAT = os.getenv("IMAGE_RENDITION_FORMAT", "webp").lower()
+IMAGE_RENDITION_QUALITY = int(os.getenv("IMAGE_RENDITION_QUALITY", "80"))
+RENDITION_WIDTHS = {
+    "thumb": int(os.getenv("THUMBNAIL_WIDTH", "320")),
+    "preview": int(os.getenv("PREVIEW_WIDTH", "960")),
+}
+
+_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+if IMAGE_RENDITION_FORMAT not in _EXTENSIONS:
+    print(f"⚠️ Unsupported IMAGE_RENDITION_FORMAT {IMAGE_RENDITION_FORMAT!r}, using jpeg")
+    IMAGE_RENDITION_FORMAT = "jpeg"
+# Pillow builds without libwebp still have JPEG
+if IMAGE_RENDITION_FORMAT == "webp" and not features.check("webp"):
+    IMAGE_RENDITION_FORMAT = "jpeg"
+
+
+def rendition_path(image_path: str, name: str) -> str:
+    """Where the named rendition of image_path lives."""
+    base, _ = os.path.splitext(image_path)
+    return f"{base}.{name}.{_EXTENSIONS[IMAGE_RENDITION_FORMAT]}"
+
+
+def _is_fresh(path: str, original: str) -> bool:
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(original)
+
+
+def _save(image: Image.Image, path: str):
+    """Write atomically so a half-written rendition is never served."""
+    tmp_path = f"{path}.{threading.get_ident()}.part"
+    try:
+        image.save(tmp_path, format=IMAGE_RENDITION_FORMAT.upper(), quality=IMAGE_RENDITION_QUALITY, optimize=True)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def create_renditions(image_path: str) -> dict:
+    """
+    Write the thumbnail and preview renditions of an image.
+    Returns {"thumb": path, "preview": path}, or {} if the image can't be read.
+    """
+    paths = {name: rendition_path(image_path, name) for name in RENDITION_WIDTHS}
+    if all(_is_fresh(path, image_path) for path in paths.values()):
+        return paths
+
+    with track_stage("image_renditions") as call:
+        try:
+            with Image.open(image_path) as source:
+                original = source.convert("RGB")
+            for name, width in RENDITION_WIDTHS.items():
+                rendition = original.copy()
+                # Never upscale; keep the aspect ratio
+                rendition.thumbnail((width, max(1, width * original.height // original.width)), Image.LANCZOS)
+                _save(rendition, paths[name])
+            return paths
+        except Exception as e:
+            call.fail()
+            print(f"⚠️ Could not create renditions for {image_path}: {e}")
+            return {}
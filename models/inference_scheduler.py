@@ -0,0 +1,147 @@
+# models/inference_scheduler.py
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class InferenceScheduler:
+    """
+    Owns a small pool of model instances and hands them out to request threads.
+    At most `max_inflight` generations run at once; everyone else waits in line.
+    Instances are created on demand, up to `num_instances`.
+    """
+
+    def __init__(self, model_factory, num_instances: int = 1, max_inflight: int = None):
+        self._model_factory = model_factory
+        self.num_instances = max(1, int(num_instances))
+        # A generation needs exclusive use of one instance, so more in-flight
+        # slots than instances would only move the waiting somewhere else.
+        requested = int(max_inflight) if max_inflight else self.num_instances
+        self.max_inflight = max(1, min(requested, self.num_instances))
+
+        self._slots = threading.BoundedSemaphore(self.max_inflight)
+        self._idle_models = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+        self._created = 0
+        self._acquired = 0
+        self._waiting = 0
+        self._inflight = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+
+    def _checkout_model(self):
+        """Take an idle instance, creating a new one if the pool is not full yet."""
+        try:
+            return self._idle_models.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            should_create = self._created < self.num_instances
+            if should_create:
+                self._created += 1
+
+        if not should_create:
+            # Holding a slot guarantees an instance comes back eventually.
+            return self._idle_models.get()
+
+        try:
+            print(f"🧠 Loading story model instance {self._created}/{self.num_instances}...")
+            return self._model_factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    @contextmanager
+    def acquire(self, timeout: float = None):
+        """
+        Wait for a free generation slot and yield a model instance.
+        Raises TimeoutError if no slot frees up within `timeout` seconds.
+        """
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+
+        try:
+            got_slot = self._slots.acquire(timeout=timeout) if timeout is not None else self._slots.acquire()
+            if not got_slot:
+                with self._lock:
+                    self._timeouts += 1
+                raise TimeoutError(f"No story model slot free after {timeout:.1f}s")
+            try:
+                model = self._checkout_model()
+            except Exception:
+                self._slots.release()
+                raise
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        waited = time.perf_counter() - enqueued_at
+        with self._lock:
+            self._inflight += 1
+            self._acquired += 1
+            self._total_wait += waited
+            self._last_wait = waited
+            self._max_wait = max(self._max_wait, waited)
+
+        failed = False
+        try:
+            yield model
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._idle_models.put(model)
+            with self._lock:
+                self._inflight -= 1
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+            self._slots.release()
+
+    def warm_up(self, count: int = 1):
+        """Load instances ahead of time until at least `count` exist."""
+        count = min(max(1, int(count)), self.num_instances)
+        with self._lock:
+            missing = max(0, count - self._created)
+            self._created += missing
+
+        for loaded in range(missing):
+            try:
+                print(f"🧠 Warming up story model instance {loaded + 1}/{missing}...")
+                self._idle_models.put(self._model_factory())
+            except Exception:
+                with self._lock:
+                    self._created -= missing - loaded
+                raise
+
+    def run(self, func, *args, timeout: float = None, **kwargs):
+        """Run func(model, *args, **kwargs) on a pooled model instance."""
+        with self.acquire(timeout=timeout) as model:
+            return func(model, *args, **kwargs)
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth, in-flight generations and wait times."""
+        with self._lock:
+            return {
+                "instances_loaded": self._created,
+                "max_instances": self.num_instances,
+                "max_inflight": self.max_inflight,
+                "inflight": self._inflight,
+                "queue_depth": self._waiting,
+                "completed": self._completed,
+                "failed": self._failed,
+                "timeouts": self._timeouts,
+                "avg_wait_seconds": round(self._total_wait / self._acquired, 3) if self._acquired else 0.0,
+                "max_wait_seconds": round(self._max_wait, 3),
+                "last_wait_seconds": round(self._last_wait, 3),
+            }
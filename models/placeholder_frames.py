@@ -0,0 +1,97 @@
+# models/placeholder_frames.py
+import hashlib
+import math
+import os
+import textwrap
+import threading
+from PIL import Image, ImageDraw, ImageFont
+
+# Local stand-in frames for scenes whose image could not be fetched in time:
+# a warm two-colour gradient, a simple rangoli-style motif and the scene text
+# as a caption. Rendering takes milliseconds and needs no network, so a video
+# can always go out on time.
+FRAME_WIDTH = 1280
+FRAME_HEIGHT = 720
+
+# (top, bottom) gradient colours; picked per scene so neighbouring frames differ
+PALETTES = [
+    ((128, 35, 52), (236, 140, 54)),    # maroon to saffron
+    ((22, 62, 92), (64, 160, 150)),     # indigo to peacock teal
+    ((70, 32, 96), (214, 96, 128)),     # purple to rose
+    ((30, 84, 52), (196, 170, 72)),     # leaf green to turmeric
+    ((96, 48, 24), (232, 190, 110)),    # earth to sand
+]
+FONT_NAMES = ["DejaVuSans.ttf", "NotoSans-Regular.ttf", "Arial.ttf"]
+
+_fonts = {}
+_fonts_lock = threading.Lock()
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    """A TrueType font when one is installed, else Pillow's built-in font."""
+    with _fonts_lock:
+        if size not in _fonts:
+            for name in FONT_NAMES:
+                try:
+                    _fonts[size] = ImageFont.truetype(name, size)
+                    break
+                except OSError:
+                    continue
+            else:
+                _fonts[size] = ImageFont.load_default(size=size)
+        return _fonts[size]
+
+
+def _gradient(top: tuple, bottom: tuple, width: int, height: int) -> Image.Image:
+    mask = Image.linear_gradient("L").resize((width, height))
+    return Image.composite(Image.new("RGB", (width, height), bottom), Image.new("RGB", (width, height), top), mask)
+
+
+def _draw_motif(draw: ImageDraw.ImageDraw, cx: int, cy: int, radius: int, petals: int, colour: tuple):
+    """Concentric rings with a ring of petals, loosely like a rangoli."""
+    for r in (radius, radius * 0.72, radius * 0.3):
+        draw.ellipse((cx - r, cy - r, cx + r, cy + r), outline=colour, width=3)
+    petal = radius * 0.22
+    for k in range(petals):
+        angle = 2 * math.pi * k / petals
+        px, py = cx + math.cos(angle) * radius * 0.86, cy + math.sin(angle) * radius * 0.86
+        draw.ellipse((px - petal, py - petal, px + petal, py + petal), outline=colour, width=2)
+
+
+def render_placeholder_frame(filename: str, caption: str, index: int = 0,
+                             width: int = FRAME_WIDTH, height: int = FRAME_HEIGHT) -> str:
+    """Draw a placeholder frame for a scene and save it as filename; returns the path."""
+    digest = hashlib.sha256(caption.encode("utf-8")).digest()
+    top, bottom = PALETTES[(index + digest[0]) % len(PALETTES)]
+    frame = _gradient(top, bottom, width, height)
+    draw = ImageDraw.Draw(frame)
+
+    motif_colour = (255, 236, 200)
+    _draw_motif(draw, width // 2, int(height * 0.36), int(height * 0.2), 8 + digest[1] % 5, motif_colour)
+
+    # Caption on a darkened band near the bottom, at most three lines
+    font_size = max(18, height // 22)
+    font = _font(font_size)
+    lines = textwrap.wrap(" ".join(caption.split()), width=60)
+    if len(lines) > 3:
+        lines = lines[:3]
+        lines[-1] += " …"
+    if lines:
+        line_height = int(font_size * 1.35)
+        band_top = height - line_height * len(lines) - height // 12
+        overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        ImageDraw.Draw(overlay).rectangle((0, band_top - 16, width, height), fill=(0, 0, 0, 110))
+        frame = Image.alpha_composite(frame.convert("RGBA"), overlay).convert("RGB")
+        draw = ImageDraw.Draw(frame)
+        for n, line in enumerate(lines):
+            draw.text((width // 2, band_top + n * line_height), line, font=font, fill=(255, 255, 255), anchor="ma")
+
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    tmp_path = f"{filename}.{threading.get_ident()}.part"
+    try:
+        frame.save(tmp_path, format="PNG", compress_level=1)
+        os.replace(tmp_path, filename)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return filename
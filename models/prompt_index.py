@@ -0,0 +1,169 @@
+# models/prompt_index.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Words that carry no scene content: common English stopwords plus the fixed
+# parts of our own prompt templates ("Scene N: ... Cultural theme: Indian,
+# art style: storybook illustration, high quality."). Without them, every
+# scene prompt would look alike.
+STOPWORDS = frozenset("""
+a an the and or but so of to in on at by for with from into over under up down out as is are was were be been
+being it its he she they them his her their this that these those there here who whom which what when where
+while then than very just also not no only own same too can will would could should had has have do does did
+i me my we our you your one once upon time
+scene cultural culture theme art style storybook illustration high quality detailed traditional simple generic
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_MERSENNE = (1 << 61) - 1
+
+
+def prompt_tokens(prompt: str) -> frozenset:
+    """Normalized content words of a prompt (lowercase, no stopwords or numbers)."""
+    return frozenset(
+        token for token in _TOKEN.findall(prompt.lower())
+        if token not in STOPWORDS and not token.isdigit() and len(token) > 1
+    )
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class PromptIndex:
+    """
+    Near-duplicate lookup over image prompts: MinHash signatures of the
+    prompt token sets, bucketed with LSH bands so a lookup only compares
+    against likely matches. Candidates are confirmed with the exact Jaccard
+    similarity. Entries are kept in SQLite so the index survives restarts.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.8, bands: int = 16, rows: int = 4, min_tokens: int = 4):
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.min_tokens = min_tokens
+        # Fixed permutations (a*x + b mod p), the same in every process
+        self._permutations = [
+            (_token_hash(f"a{i}") % (_MERSENNE - 1) + 1, _token_hash(f"b{i}") % _MERSENNE)
+            for i in range(bands * rows)
+        ]
+        self._lock = threading.Lock()
+        self._conn = None
+        self._entries = {}   # cache_key -> (group, tokens)
+        self._buckets = {}   # (group, band, band hash) -> {cache_key}
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and load existing entries (first call only)."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prompts ("
+                "cache_key TEXT PRIMARY KEY, grp TEXT NOT NULL, "
+                "tokens TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            for cache_key, group, tokens in conn.execute("SELECT cache_key, grp, tokens FROM prompts"):
+                self._insert(cache_key, group, frozenset(json.loads(tokens)))
+            self._conn = conn
+        return self._conn
+
+    def signature(self, tokens: frozenset) -> list:
+        hashes = [_token_hash(token) for token in tokens]
+        return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._permutations]
+
+    def _band_keys(self, group: str, tokens: frozenset) -> list:
+        signature = self.signature(tokens)
+        return [
+            (group, band, hash(tuple(signature[band * self.rows:(band + 1) * self.rows])))
+            for band in range(self.bands)
+        ]
+
+    def _insert(self, cache_key: str, group: str, tokens: frozenset):
+        self._entries[cache_key] = (group, tokens)
+        for band_key in self._band_keys(group, tokens):
+            self._buckets.setdefault(band_key, set()).add(cache_key)
+
+    def _discard(self, cache_key: str):
+        group, tokens = self._entries.pop(cache_key)
+        for band_key in self._band_keys(group, tokens):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(cache_key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def find(self, prompt: str, group: str):
+        """
+        The cache key of the most similar indexed prompt in the same group
+        (style and size), if it is at least `threshold` similar; else None.
+        """
+        tokens = prompt_tokens(prompt)
+        with self._lock:
+            self._connect()
+            best_key, best_score = None, 0.0
+            if len(tokens) >= self.min_tokens:
+                candidates = set()
+                for band_key in self._band_keys(group, tokens):
+                    candidates |= self._buckets.get(band_key, set())
+                for cache_key in candidates:
+                    score = jaccard(tokens, self._entries[cache_key][1])
+                    if score > best_score:
+                        best_key, best_score = cache_key, score
+            if best_score >= self.threshold:
+                self.hits += 1
+                return best_key
+            self.misses += 1
+            return None
+
+    def add(self, prompt: str, group: str, cache_key: str):
+        """Index a generated image's prompt under its image cache key."""
+        tokens = prompt_tokens(prompt)
+        if len(tokens) < self.min_tokens:
+            return
+        with self._lock:
+            conn = self._connect()
+            if cache_key in self._entries:
+                self._discard(cache_key)
+            self._insert(cache_key, group, tokens)
+            conn.execute(
+                "INSERT OR REPLACE INTO prompts (cache_key, grp, tokens, created) VALUES (?, ?, ?, ?)",
+                (cache_key, group, json.dumps(sorted(tokens)), time.time()),
+            )
+            conn.commit()
+
+    def remove(self, cache_key: str):
+        """Forget an entry whose image is no longer cached."""
+        with self._lock:
+            conn = self._connect()
+            if cache_key in self._entries:
+                self._discard(cache_key)
+            conn.execute("DELETE FROM prompts WHERE cache_key = ?", (cache_key,))
+            conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._connect()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,104 @@
+# models/prompt_prefix.py
+import threading
+
+# Orca Mini prompt format. The system block holds the fixed story instructions,
+# so it is the shared prefix of every story prompt.
+ORCA_SYSTEM_TEMPLATE = "### System:\n{0}\n\n"
+ORCA_USER_TEMPLATE = "### User:\n%1\n\n### Response:\n"
+
+
+def _ignore_tokens(token_id, response):
+    return True
+
+
+class PromptPrefixCache:
+    """
+    Evaluates a fixed prompt prefix once per model instance and reuses its KV state.
+
+    After the prefix is ingested we remember the context position (n_past). For
+    each request the position is rewound to that checkpoint, so llama.cpp keeps
+    the prefix in its KV cache and only evaluates the variable user prompt.
+    """
+
+    def __init__(self, system_prompt: str):
+        self.prefix_text = ORCA_SYSTEM_TEMPLATE.format(system_prompt)
+        self._checkpoints = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def supports(model) -> bool:
+        """True if this GPT4All binding exposes the low-level prompt API we need."""
+        llm = getattr(model, "model", None)
+        return llm is not None and hasattr(llm, "prompt_model")
+
+    def _ingest_prefix(self, llm) -> int:
+        try:
+            llm.prompt_model(self.prefix_text, "%1", _ignore_tokens, n_predict=0, reset_context=True, special=True)
+        except TypeError:
+            # Older bindings have no `special` argument
+            llm.prompt_model(self.prefix_text, "%1", _ignore_tokens, n_predict=0, reset_context=True)
+        n_past = llm.context.n_past
+        if not isinstance(n_past, int) or n_past <= 0:
+            raise RuntimeError(f"Unexpected context position after the prefix: {n_past!r}")
+        return n_past
+
+    def generate(self, model, user_prompt: str, max_tokens: int, callback=None, reuse: bool = True, **sampling) -> str:
+        """
+        Generate a response for user_prompt on top of the cached prefix.
+        callback(token_id, response) works like GPT4All's: returning False stops generation.
+        With reuse=False the prefix is evaluated again (used for benchmarking).
+        """
+        llm = model.model
+        key = id(model)
+
+        with self._lock:
+            checkpoint = self._checkpoints.get(key) if reuse else None
+
+        if checkpoint is None:
+            checkpoint = self._ingest_prefix(llm)
+            with self._lock:
+                self._checkpoints[key] = checkpoint
+                self.misses += 1
+        else:
+            # Rewind to just after the prefix; everything later gets overwritten.
+            # A position before the checkpoint means the context was reset
+            # behind our back and the prefix is gone.
+            n_past = llm.context.n_past
+            if not isinstance(n_past, int) or n_past < checkpoint:
+                raise RuntimeError(f"Unexpected context position {n_past!r}, prefix ends at {checkpoint}")
+            llm.context.n_past = checkpoint
+            if llm.context.n_past != checkpoint:
+                raise RuntimeError("Could not rewind the context to the prompt prefix")
+            with self._lock:
+                self.hits += 1
+
+        pieces = []
+
+        def _collect(token_id, response):
+            pieces.append(response)
+            return True if callback is None else callback(token_id, response)
+
+        llm.prompt_model(
+            user_prompt,
+            ORCA_USER_TEMPLATE,
+            _collect,
+            n_predict=max_tokens,
+            reset_context=False,
+            **sampling
+        )
+        return "".join(pieces)
+
+    def forget(self, model):
+        """Drop the checkpoint of a model instance, e.g. after an error left its context unknown."""
+        with self._lock:
+            self._checkpoints.pop(id(model), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "prefix_hits": self.hits,
+                "prefix_misses": self.misses,
+                "instances_primed": len(self._checkpoints),
+            }
@@ -0,0 +1,100 @@
+# models/replacement_engine.py
+import json
+import os
+import re
+import threading
+
+REPLACEMENT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "replacements")
+
+# Sentence punctuation that takes no space before it (Hindi danda included)
+PUNCTUATION = "।,!?"
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _canonical(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _trie_pattern(phrases) -> str:
+    """
+    Compile phrases into one regex shaped like a character trie, so matching
+    cost depends on the text and the phrase length, not on how many phrases
+    there are. Longer phrases win over their prefixes; a space in a phrase
+    matches any run of whitespace.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items())
+            if char != ""
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A phrase ends here, but a longer one may continue (greedy, so longer wins)
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class ReplacementEngine:
+    """
+    Applies a phrase table plus whitespace/punctuation clean-up in one scan:
+    phrases are replaced, whitespace runs become one space, spaces before
+    punctuation are dropped and consecutive punctuation marks are spaced.
+    """
+
+    def __init__(self, replacements: dict):
+        self.replacements = {
+            _canonical(old): new for old, new in replacements.items() if _canonical(old)
+        }
+        alternatives = []
+        if self.replacements:
+            alternatives.append(f"(?P<phrase>{_trie_pattern(self.replacements)})")
+        marks = re.escape(PUNCTUATION)
+        alternatives += [
+            rf"(?P<gap>\s+(?=[{marks}]))",
+            # Only whitespace that needs changing; single spaces are left alone
+            r"(?P<space>\s\s+|[^\S ])",
+            rf"(?P<mark>[{marks}])\s*(?=[{marks}])",
+        ]
+        self._pattern = re.compile("|".join(alternatives))
+
+    def _substitute(self, match) -> str:
+        kind = match.lastgroup
+        if kind == "phrase":
+            return self.replacements[_canonical(match.group())]
+        if kind == "gap":
+            return ""
+        if kind == "space":
+            return " "
+        return match.group("mark") + " "
+
+    def apply(self, text: str) -> str:
+        return self._pattern.sub(self._substitute, text)
+
+
+def load_replacement_table(language: str, directory: str = REPLACEMENT_DIR) -> dict:
+    """The {phrase: replacement} table in <directory>/<language>.json, or {} if there is none."""
+    path = os.path.join(directory, f"{language}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("replacements", {})
+
+
+def get_replacement_engine(language: str) -> ReplacementEngine:
+    """Compiled engine for a language, built once and shared."""
+    with _engines_lock:
+        if language not in _engines:
+            _engines[language] = ReplacementEngine(load_replacement_table(language))
+        return _engines[language]
@@ -0,0 +1,87 @@
+# models/scene_planner.py
+import os
+
+# One image per sentence makes wordy stories expensive (15+ remote image
+# requests). The planner groups consecutive sentences into at most
+# SCENE_MAX_IMAGES scenes of roughly equal length, never shorter than
+# SCENE_MIN_WORDS words, and no more than the image stage can fetch within
+# its time budget. Every sentence stays in exactly one scene.
+SCENE_MAX_IMAGES = int(os.getenv("SCENE_MAX_IMAGES", "8"))
+SCENE_MIN_WORDS = int(os.getenv("SCENE_MIN_WORDS", "12"))
+# Expected seconds for one image fetch, used to size the plan to the deadline
+SCENE_IMAGE_SECONDS = float(os.getenv("SCENE_IMAGE_SECONDS", "40"))
+
+# Narration pace used for scene durations (matches the old per-frame timing)
+WORDS_PER_SECOND = 2.0
+MIN_SCENE_SECONDS = 3.0
+
+
+def _word_count(text: str) -> int:
+    return len(text.split())
+
+
+def target_scene_count(sentences: list, max_images: int = SCENE_MAX_IMAGES, min_words: int = SCENE_MIN_WORDS,
+                       time_budget: float = None, concurrency: int = 1) -> int:
+    """How many scenes to plan for, given the story length and the image budget."""
+    if not sentences:
+        return 0
+    total_words = sum(_word_count(s) for s in sentences)
+    count = min(len(sentences), max(1, max_images), max(1, total_words // max(1, min_words)))
+    if time_budget is not None:
+        # Images are fetched `concurrency` at a time, each taking about SCENE_IMAGE_SECONDS
+        rounds = max(1, int(time_budget // SCENE_IMAGE_SECONDS))
+        count = min(count, rounds * max(1, concurrency))
+    return count
+
+
+def group_sentences(sentences: list, count: int) -> list:
+    """
+    Split sentences into `count` consecutive groups with similar word counts:
+    each cut goes where the running word count is closest to an even share.
+    """
+    if count <= 0 or not sentences:
+        return []
+    if count >= len(sentences):
+        return [[s] for s in sentences]
+
+    cumulative = []
+    total = 0
+    for sentence in sentences:
+        total += _word_count(sentence)
+        cumulative.append(total)
+
+    cuts = []
+    start = 0
+    for j in range(1, count):
+        ideal = total * j / count
+        # Leave at least one sentence for this group and for each group after it
+        lowest, highest = start + 1, len(sentences) - (count - j)
+        cut = min(range(lowest, highest + 1), key=lambda i: abs(cumulative[i - 1] - ideal))
+        cuts.append(cut)
+        start = cut
+
+    bounds = [0] + cuts + [len(sentences)]
+    return [sentences[bounds[i]:bounds[i + 1]] for i in range(count)]
+
+
+def scene_duration(scene: str) -> float:
+    """Seconds a scene stays on screen at narration pace."""
+    return max(MIN_SCENE_SECONDS, _word_count(scene) / WORDS_PER_SECOND)
+
+
+def plan_scenes(sentences: list, max_images: int = SCENE_MAX_IMAGES, min_words: int = SCENE_MIN_WORDS,
+                time_budget: float = None, concurrency: int = 1) -> dict:
+    """
+    Group sentences into scenes for the image stage.
+    Returns {"scenes": [text], "durations": [seconds], "sentence_counts": [n]},
+    all in story order.
+    """
+    count = target_scene_count(sentences, max_images, min_words, time_budget, concurrency)
+    groups = group_sentences(sentences, count)
+    scenes = [" ".join(group) for group in groups]
+    print(f"🗂️ Planned {len(scenes)} scenes from {len(sentences)} sentences")
+    return {
+        "scenes": scenes,
+        "durations": [scene_duration(scene) for scene in scenes],
+        "sentence_counts": [len(group) for group in groups],
+    }
@@ -1,113 +1,462 @@
 # models/story_generator.py
-from gpt4all import GPT4All
 import os
-import re
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from models.inference_scheduler import InferenceScheduler
+from models.prompt_prefix import PromptPrefixCache
+from models.early_stop import StoryStopper, EarlyStopStats
+from models.translation import translate_sentences, router as translation_router
+from models.translation_memory import TranslationMemory
+from models.replacement_engine import get_replacement_engine
+from models.text_segmenter import (
+    split_sentences,
+    complete_sentences,
+    group_sentences,
+    ensure_terminated,
+)
+from caching import CACHE_ROOT, TieredCache, make_cache_key
+from metrics import GenerationTimer, track_stage
+from warmup import mark_ready
 
 # Load Orca Mini 3B model (optimized for low-spec machines)
 model_path = os.path.join(os.path.dirname(__file__), "q4_0-orca-mini-3b.gguf")
-model = GPT4All(model_path)
+
+
+
+def load_model():
+    """Load one GPT4All instance. gpt4all is imported here to keep app startup fast."""
+    from gpt4all import GPT4All
+    model = GPT4All(model_path)
+    mark_ready("story_model")
+    return model
+
+
+def load_batch_backend():
+    """Load the llama.cpp backend for the batching engine."""
+    from models.batch_engine import LlamaCppBackend
+    backend = LlamaCppBackend(model_path, max_sequences=STORY_BATCH_SIZE)
+    mark_ready("story_model")
+    return backend
+
+
+# One GPT4All instance is not safe to share between Flask threads, so every
+# generation borrows an instance from the scheduler. Each extra instance costs
+# another copy of the model in RAM (~2-3GB for Orca Mini 3B). Instances are
+# loaded on first use, or ahead of time by warm_up_model().
+scheduler = InferenceScheduler(
+    load_model,
+    num_instances=int(os.getenv("STORY_MODEL_INSTANCES", "1")),
+    max_inflight=int(os.getenv("STORY_MAX_INFLIGHT", "0")) or None,
+)
+STORY_QUEUE_TIMEOUT = float(os.getenv("STORY_QUEUE_TIMEOUT", "600"))
+
+# STORY_ENGINE=batch decodes concurrent requests together on llama.cpp
+# (needs llama-cpp-python). The default keeps one generation per instance.
+STORY_ENGINE = os.getenv("STORY_ENGINE", "scheduler")
+STORY_BATCH_SIZE = int(os.getenv("STORY_BATCH_SIZE", "8"))
+_batch_engine = None
+_batch_engine_lock = threading.Lock()
 
 
 
 # approch 2
 
-def generate_story(prompt: str, max_tokens: int = 280) -> str:
+# Sampling settings shared by every story generation
+STORY_SAMPLING = {
+    "temp": 0.75,
+    "top_p": 0.9,
+    "top_k": 40,
+    "repeat_penalty": 1.15,
+}
+
+SENTENCES_PER_SCENE = 3
+
+# Stop generating once the story has all its paragraphs/sentences, or once the
+# model starts writing a new chat turn. STORY_EARLY_STOP=0 always runs to max_tokens.
+STORY_EARLY_STOP = os.getenv("STORY_EARLY_STOP", "1") != "0"
+STORY_MAX_PARAGRAPHS = int(os.getenv("STORY_MAX_PARAGRAPHS", "4"))
+early_stop_stats = EarlyStopStats()
+
+# Seeded stories are cached on (prompt, model file, sampling params, seed), so
+# asking for the same seed again returns the same story without touching the
+# model. STORY_DETERMINISTIC=1 gives every request the STORY_SEED seed.
+STORY_DETERMINISTIC = os.getenv("STORY_DETERMINISTIC", "0") == "1"
+STORY_SEED = int(os.getenv("STORY_SEED", "0"))
+story_cache = TieredCache(
+    "stories",
+    max_entries=int(os.getenv("STORY_CACHE_ENTRIES", "256")),
+    max_disk_bytes=int(os.getenv("STORY_CACHE_MAX_MB", "20")) * 1024 * 1024,
+)
+
+
+# Fixed instructions shared by every story request. They are sent as the
+# system prompt so their evaluated KV state can be reused between requests.
+STORY_SYSTEM_PROMPT = (
+    "You are a storyteller. Structure every story into 3–4 short paragraphs:\n"
+    "1. Beginning: Introduce setting and characters.\n"
+    "2. Middle: Describe the main conflict or event.\n"
+    "3. Ending: Provide a resolution and conclusion.\n\n"
+    "Make it vivid, easy to follow, and entertaining."
+)
+
+# Reuse the evaluated system prompt between requests (STORY_PREFIX_REUSE=0 disables)
+prefix_cache = PromptPrefixCache(STORY_SYSTEM_PROMPT)
+PREFIX_REUSE = os.getenv("STORY_PREFIX_REUSE", "1") != "0"
+_prefix_reuse_supported = True
+
+
+def build_story_prompt(prompt: str) -> str:
+    """The variable part of a story prompt; the instructions live in STORY_SYSTEM_PROMPT."""
+    return f"Write a short story about {prompt}."
+
+
+def clean_model_output(text: str) -> str:
+    """Strip chat-role leftovers and collapse whitespace in raw model output."""
+    story = text.strip()
+    story = story.replace("assistant:", "").replace("user:", "")
+    return " ".join(story.split())
+
+
+def split_story_sentences(story: str) -> list:
+    """Sentences of a cleaned story; a cut-off last sentence gets its full stop back."""
+    sentences = split_sentences(story)
+    if sentences:
+        sentences[-1] = ensure_terminated(sentences[-1])
+    return sentences
+
+
+def group_story_sentences(sentences: list, final: bool = True) -> list:
     """
-    Generate an engaging story with clear paragraphs per scene.
-    Uses Orca Mini model.
+    Group sentences into scene paragraphs of SENTENCES_PER_SCENE.
+    With final=False only complete groups are returned.
     """
-    try:
-        # Structured prompt for scene-based output
-        enhanced_prompt = (
-            f"Write a short story about {prompt}.\n\n"
-            "Structure the story into 3–4 short paragraphs:\n"
-            "1. Beginning: Introduce setting and characters.\n"
-            "2. Middle: Describe the main conflict or event.\n"
-            "3. Ending: Provide a resolution and conclusion.\n\n"
-            "Make it vivid, easy to follow, and entertaining."
+    return group_sentences(sentences, SENTENCES_PER_SCENE, final=final)
+
+
+def get_batch_engine():
+    """Create the continuous-batching engine on first use."""
+    global _batch_engine
+    with _batch_engine_lock:
+        if _batch_engine is None:
+            from models.batch_engine import ContinuousBatchEngine
+            _batch_engine = ContinuousBatchEngine(
+                load_batch_backend,
+                STORY_SYSTEM_PROMPT,
+                max_sequences=STORY_BATCH_SIZE,
+            )
+        return _batch_engine
+
+
+def generate_tokens(prompt: str, max_tokens: int, on_token=None, seed: int = None) -> str:
+    """
+    Run one generation and return the raw response.
+    on_token(text) is called for every new token; returning False stops generation.
+    The seed is only honoured by the batching engine; gpt4all has no per-call seed.
+    """
+    timer = GenerationTimer()
+    with track_stage("llm_generate"):
+        try:
+            return _generate_tokens(prompt, max_tokens, on_token, seed, timer)
+        finally:
+            timer.finish()
+
+
+def _generate_tokens(prompt: str, max_tokens: int, on_token, seed: int, timer: GenerationTimer) -> str:
+    def _timed(token):
+        timer.token()
+        return on_token(token) if on_token is not None else True
+
+    if not STORY_EARLY_STOP:
+        return _run_model(prompt, max_tokens, _timed, seed, timer)
+
+    stopper = StoryStopper(
+        max_paragraphs=STORY_MAX_PARAGRAPHS,
+        max_sentences=STORY_MAX_PARAGRAPHS * SENTENCES_PER_SCENE,
+    )
+
+    def _on_token(token):
+        timer.token()
+        keep_going = stopper(token)
+        if stopper.reason == "junk":
+            # Do not pass the start of a chat turn on to streaming clients
+            return False
+        if on_token is not None and on_token(token) is False:
+            keep_going = False
+        return keep_going
+
+    _run_model(prompt, max_tokens, _on_token, seed, timer)
+    early_stop_stats.record(stopper, max_tokens)
+    return stopper.text()
+
+
+def _run_model(prompt: str, max_tokens: int, on_token, seed: int, timer: GenerationTimer = None) -> str:
+    """Dispatch one generation to the batching engine or a pooled gpt4all instance."""
+    global _prefix_reuse_supported
+
+    if STORY_ENGINE == "batch":
+        if timer is not None:
+            timer.model_start()
+        return get_batch_engine().generate(
+            build_story_prompt(prompt),
+            max_tokens,
+            STORY_SAMPLING,
+            on_token=on_token,
+            seed=seed,
         )
 
-        with model.chat_session():
-            response = model.generate(
-                enhanced_prompt,
+    def _callback(token_id, response):
+        if on_token is None:
+            return True
+        return on_token(response) is not False
+
+    with scheduler.acquire(timeout=STORY_QUEUE_TIMEOUT) as model:
+        if timer is not None:
+            timer.model_start()
+        if PREFIX_REUSE and _prefix_reuse_supported and prefix_cache.supports(model):
+            streamed = []
+
+            def _prefix_callback(token_id, response):
+                streamed.append(response)
+                return _callback(token_id, response)
+
+            try:
+                return prefix_cache.generate(
+                    model,
+                    build_story_prompt(prompt),
+                    max_tokens,
+                    callback=_prefix_callback,
+                    **STORY_SAMPLING
+                )
+            except Exception as e:
+                # Prefix reuse relies on gpt4all internals (prompt_model,
+                # context.n_past); after any failure the context position is
+                # unknown, so stop using them and evaluate full prompts
+                prefix_cache.forget(model)
+                _prefix_reuse_supported = False
+                if streamed:
+                    # Tokens already reached the caller; a second run would repeat them
+                    raise
+                print(f"⚠️ Prompt prefix reuse unavailable, evaluating full prompts: {e}")
+
+        with model.chat_session(STORY_SYSTEM_PROMPT):
+            return model.generate(
+                build_story_prompt(prompt),
                 max_tokens=max_tokens,
-                temp=0.75,
-                top_p=0.9,
-                top_k=40,
-                repeat_penalty=1.15
+                callback=_callback,
+                **STORY_SAMPLING
             )
 
+
+def story_cache_key(prompt: str, max_tokens: int, seed: int) -> str:
+    """Cache key covering everything that determines a seeded story."""
+    try:
+        model_size = os.path.getsize(model_path)
+    except OSError:
+        model_size = None
+    return make_cache_key(
+        "story",
+        STORY_SYSTEM_PROMPT,
+        build_story_prompt(prompt),
+        os.path.basename(model_path),
+        model_size,
+        STORY_SAMPLING,
+        max_tokens,
+        seed,
+    )
+
+
+def generate_story(prompt: str, max_tokens: int = 280, seed: int = None, should_stop=None) -> str:
+    """
+    Generate an engaging story with clear paragraphs per scene.
+    Uses Orca Mini model. With a seed (or STORY_DETERMINISTIC=1) the story is
+    cached and the same seed always returns the same story.
+    should_stop() is checked on every token; when it returns True generation
+    is abandoned and an error is returned instead of a truncated story.
+    """
+    try:
+        if seed is None and STORY_DETERMINISTIC:
+            seed = STORY_SEED
+
+        cache_key = None
+        if seed is not None:
+            cache_key = story_cache_key(prompt, max_tokens, int(seed))
+            cached = story_cache.get(cache_key)
+            if cached is not None:
+                print(f"📦 Story cache hit (seed {seed})")
+                return cached
+
+        stopped = threading.Event()
+
+        def _on_token(token):
+            if should_stop():
+                stopped.set()
+                return False
+            return True
+
+        response = generate_tokens(prompt, max_tokens, on_token=_on_token if should_stop else None, seed=seed)
+        if stopped.is_set():
+            return "Error generating story: stopped before completion"
+
         # Cleanup
-        story = response.strip()
-        story = story.replace("assistant:", "").replace("user:", "")
-        story = " ".join(story.split())
+        story = clean_model_output(response)
 
         # Split into paragraphs per scene (English only)
-        sentences = story.split(". ")
-        grouped = []
-        buffer = []
-        for i, sentence in enumerate(sentences, 1):
-            sentence = sentence.strip()
-            if sentence:
-                buffer.append(sentence)
-            if i % 3 == 0 or i == len(sentences):
-                grouped.append(". ".join(buffer).strip() + ".")
-                buffer = []
-
-        return "\n\n".join(grouped)
+        story = "\n\n".join(group_story_sentences(split_story_sentences(story)))
+
+        if cache_key is not None and story.strip():
+            story_cache.put(cache_key, story)
+        return story
 
     except Exception as e:
         print(f"Story englis to hindi translation error: {e}")   
         return f"Error generating story: {e}"
 
 
+def stream_story(prompt: str, max_tokens: int = 280):
+    """
+    Generate a story and yield events while the model is still writing.
+    Yields ("token", text) for every token, ("scene", paragraph) as soon as a
+    scene paragraph is complete, and finally ("done", story) with the same
+    text generate_story would have returned.
+    """
+    events = queue.Queue()
+    cancelled = threading.Event()
+    finished = object()
+
+    def _on_token(token):
+        events.put(("token", token))
+        return not cancelled.is_set()
+
+    def _produce():
+        try:
+            events.put(("response", generate_tokens(prompt, max_tokens, on_token=_on_token)))
+        except Exception as e:
+            events.put(("error", f"Error generating story: {e}"))
+        finally:
+            events.put((finished, None))
+
+    threading.Thread(target=_produce, daemon=True).start()
+
+    raw_text = ""
+    response = None
+    scenes_sent = 0
+    try:
+        while True:
+            kind, payload = events.get()
+            if kind is finished:
+                break
+            if kind == "error":
+                yield "error", payload
+                return
+            if kind == "response":
+                response = payload
+                continue
+
+            raw_text += payload
+            yield "token", payload
+
+            complete = complete_sentences(clean_model_output(raw_text))
+            for scene in group_story_sentences(complete, final=False)[scenes_sent:]:
+                scenes_sent += 1
+                yield "scene", scene
+
+        story_scenes = group_story_sentences(split_story_sentences(clean_model_output(response or raw_text)))
+        for scene in story_scenes[scenes_sent:]:
+            yield "scene", scene
+        yield "done", "\n\n".join(story_scenes)
+    finally:
+        # Client went away or we are done: let the model stop early
+        cancelled.set()
+
 
 
 
 
-def translate_to_hindi(english_text: str) -> str:
+
+# Replacements for more natural Hindi, from data/replacements/hi.json,
+# compiled once into a single-pass engine
+hindi_replacer = get_replacement_engine("hi")
+HINDI_POSTPROCESS_VERSION = make_cache_key(hindi_replacer.replacements)[:12]
+
+# Translate Hindi stories scene by scene while the model is still writing
+# (STORY_PIPELINED_TRANSLATION=0 waits for the whole English story first)
+PIPELINED_TRANSLATION = os.getenv("STORY_PIPELINED_TRANSLATION", "1") != "0"
+# Scenes translated at once, across all stories being generated
+TRANSLATE_PIPELINE_WORKERS = int(os.getenv("TRANSLATE_PIPELINE_WORKERS", "4"))
+_pipeline_executor = ThreadPoolExecutor(max_workers=TRANSLATE_PIPELINE_WORKERS, thread_name_prefix="scene-translate")
+
+# Post-processed Hindi sentences, so stock sentences are only translated once
+# (TRANSLATION_MEMORY=0 disables)
+TRANSLATION_MEMORY = os.getenv("TRANSLATION_MEMORY", "1") != "0"
+translation_memory = TranslationMemory(os.path.join(CACHE_ROOT, "translation_memory.sqlite3"))
+
+
+def translate_to_hindi(english_text: str, translator: str = None, strict: bool = False) -> str:
     """
-    Translate English text to Hindi using a simpler, more reliable approach.
+    Translate English text to Hindi sentence by sentence. Sentences found in
+    the translation memory are reused; the rest go to the translator backends
+    (translator picks the one to try first). Falls back to the English text
+    if every backend fails, or raises instead when strict is set.
     """
-    try:
-        import requests
-        
-        # Simple, reliable translation approach
-        url = "https://translate.googleapis.com/translate_a/single"
-        params = {
-            'client': 'gtx',
-            'sl': 'en',  # source language: English
-            'tl': 'hi',  # target language: Hindi
-            'dt': 't',   # return translation
-            'q': english_text.strip()
-        }
-        
-        response = requests.get(url, params=params, timeout=5)  # Shorter timeout
-        if response.status_code == 200:
-            result = response.json()
-            # Extract translated text from response
-            translated_text = ""
-            if result and len(result) > 0 and result[0]:
-                for translation_part in result[0]:
-                    if translation_part and translation_part[0]:
-                        translated_text += translation_part[0]
-            
-            if translated_text.strip():
-                # Post-processing for more natural Hindi
-                hindi_text = post_process_hindi_translation(translated_text)
-                return hindi_text
-            else:
-                return english_text  # Fallback to original
-        else:
-            return english_text  # Fallback to original
-            
-    except Exception as e:
-        print(f"Translation error: {e}")
-        return english_text  # Return original if translation fails
+    with track_stage("translate_to_hindi") as call:
+        try:
+            sentences = split_sentences(english_text.strip())
+            if not sentences:
+                raise ValueError("nothing to translate")
+
+            # An explicitly chosen offline/stub backend should not get remote results
+            chosen = translation_router.backends.get(translator)
+            use_memory = TRANSLATION_MEMORY and (chosen is None or chosen.memoize)
+            keys = [TranslationMemory.key(s, "hi", HINDI_POSTPROCESS_VERSION) for s in sentences]
+            known = translation_memory.get_many(keys) if use_memory else {}
+
+            # Translate each missing sentence once, even if it repeats
+            missing = {}
+            for key, sentence in zip(keys, sentences):
+                if key not in known:
+                    missing.setdefault(key, sentence)
+            if missing:
+                translated, backend = translate_sentences(
+                    list(missing.values()), target="hi", source="en", backend=translator
+                )
+                new_entries = {
+                    key: apply_hindi_replacements(text)
+                    for key, text in zip(missing, translated)
+                }
+                if use_memory and backend.memoize:
+                    translation_memory.put_many(new_entries, "hi")
+                known.update(new_entries)
+
+            # Post-processing for more natural Hindi
+            return format_hindi_story(" ".join(known[key] for key in keys))
+
+        except Exception as e:
+            print(f"Translation error: {e}")
+            call.fail()
+            if strict:
+                raise
+            return english_text  # Return original if translation fails
+
 
+def apply_hindi_replacements(hindi_text: str) -> str:
+    """Apply the Hindi replacement table and tidy spaces and punctuation in one scan."""
+    return hindi_replacer.apply(hindi_text).strip()
 
 
-import re
+def format_hindi_story(hindi_text: str, sentences_per_paragraph: int = 3) -> str:
+    """Terminate every sentence with a danda and group them into scene paragraphs."""
+    # Ensure proper sentence ending
+    if hindi_text and not hindi_text.endswith(('।', '!', '?', '"', "'")):
+        if hindi_text.endswith('.'):
+            hindi_text = hindi_text[:-1] + '।'
+        else:
+            hindi_text += '।'
+
+    # Split into paragraphs per scene
+    sentences = [ensure_terminated(sentence, '।') for sentence in split_sentences(hindi_text)]
+    return "\n\n".join(group_sentences(sentences, sentences_per_paragraph))
+
 
 def post_process_hindi_translation(hindi_text: str, sentences_per_paragraph: int = 3) -> str:
     """
@@ -121,55 +470,7 @@ def post_process_hindi_translation(hindi_text: str, sentences_per_paragraph: int
         Cleaned and paragraph-formatted Hindi story.
     """
     try:
-        # Common replacements for more natural Hindi
-        replacements = {
-            'एक बार': 'एक समय',
-            'वह था': 'था',
-            'वह थी': 'थी',
-            'बहुत समय पहले': 'बहुत पुराने समय में',
-            'अंत में': 'अंततः',
-            'और फिर': 'फिर',
-            'इसके बाद': 'उसके बाद',
-            'वे सभी': 'सभी',
-            'बहुत खुश': 'अत्यंत प्रसन्न',
-            'बहुत दुखी': 'अत्यंत दुखी',
-            'के साथ साथ': 'के साथ',
-            'में से एक': 'में से',
-            'की तरह': 'के समान',
-            'के लिए': 'हेतु',
-            'के द्वारा': 'से',
-            'के कारण': 'की वजह से',
-        }
-        
-        # Apply replacements
-        for old, new in replacements.items():
-            hindi_text = hindi_text.replace(old, new)
-        
-        # Clean up spaces and punctuation
-        hindi_text = re.sub(r'\s+', ' ', hindi_text)
-        hindi_text = re.sub(r'\s+([।,!?])', r'\1', hindi_text)
-        hindi_text = re.sub(r'([।,!?])\s*([।,!?])', r'\1 \2', hindi_text)
-        
-        # Ensure proper sentence ending
-        if hindi_text and not hindi_text.endswith(('।', '!', '?', '"', "'")):
-            if hindi_text.endswith('.'):
-                hindi_text = hindi_text[:-1] + '।'
-            else:
-                hindi_text += '।'
-        
-        # Split into paragraphs per scene
-        sentences = hindi_text.split('।')
-        grouped = []
-        buffer = []
-        for i, sentence in enumerate(sentences, 1):
-            sentence = sentence.strip()
-            if sentence:
-                buffer.append(sentence + '।')
-            if i % sentences_per_paragraph == 0 or i == len(sentences):
-                grouped.append(" ".join(buffer).strip())
-                buffer = []
-
-        return "\n\n".join(grouped)
+        return format_hindi_story(apply_hindi_replacements(hindi_text), sentences_per_paragraph)
     
     except Exception as e:
         print(f"Post-processing error: {e}")
@@ -177,20 +478,123 @@ def post_process_hindi_translation(hindi_text: str, sentences_per_paragraph: int
 
 
 
-def generate_cultural_story(theme: str,  language: str = "English") -> str:
+class PipelinedTranslation:
+    """
+    Translates scenes to Hindi while the story is still being generated:
+    add() starts translating a finished scene right away, finish() waits for
+    all of them and assembles the Hindi story in scene order.
+    A scene whose translation failed is retried once (the router has moved
+    the failing backend to the back by then); if it still fails, the whole
+    English story is returned, as the unpipelined path does, rather than a
+    story that is half Hindi and half English.
+    """
+
+    def __init__(self, translator: str = None):
+        self.translator = translator
+        self._futures = {}
+
+    def add(self, scene: str):
+        if scene not in self._futures:
+            self._futures[scene] = _pipeline_executor.submit(translate_to_hindi, scene, self.translator, True)
+
+    def _scene_result(self, scene: str) -> str:
+        try:
+            return self._futures[scene].result()
+        except Exception:
+            print("🔁 Retrying translation of a failed scene")
+            return translate_to_hindi(scene, self.translator, strict=True)
+
+    def finish(self, english_story: str) -> str:
+        scenes = [scene for scene in english_story.split("\n\n") if scene.strip()]
+        # A streamed scene can differ from the final text if generation was cut
+        # short; those are translated now
+        for scene in scenes:
+            self.add(scene)
+        try:
+            return "\n\n".join(self._scene_result(scene) for scene in scenes)
+        except Exception as e:
+            print(f"Translation error, returning the English story: {e}")
+            return english_story
+
+
+def generate_translated_story(prompt: str, max_tokens: int = 280, seed: int = None, translator: str = None,
+                              should_stop=None) -> tuple:
+    """
+    Generate a story and its Hindi translation, returning (hindi, english).
+    Unseeded stories are translated scene by scene while the model is still
+    writing; seeded and stoppable (background) stories are translated whole.
+    """
+    if seed is not None or STORY_DETERMINISTIC or not PIPELINED_TRANSLATION or should_stop is not None:
+        english_story = generate_story(prompt, max_tokens=max_tokens, seed=seed, should_stop=should_stop)
+        if english_story.startswith("Error"):
+            return english_story, english_story
+        return translate_to_hindi(english_story, translator=translator), english_story
+
+    pipeline = PipelinedTranslation(translator)
+    for event, payload in stream_story(prompt, max_tokens=max_tokens):
+        if event == "scene":
+            pipeline.add(payload)
+        elif event == "error":
+            return payload, payload
+        elif event == "done":
+            return pipeline.finish(payload), payload
+    return "Error generating story: no output", "Error generating story: no output"
+
+
+def generate_cultural_story(theme: str,  language: str = "English", seed: int = None, translator: str = None,
+                            should_stop=None) -> str:
     """
     Generate a detailed cultural story suitable for video generation.
     Always generates in English first, then translates if needed.
+    should_stop lets background callers give the model up to waiting requests.
     """
     # culture_context = f" from {culture} culture" if culture else ""
     print("generate_cultural_story func language :"+language)
     # Always generate in English first
     prompt = f"Tell a short and captivating {theme} story  with indian cultural details.. Include characters, vivid descriptions, and a complete narrative with cultural elements."
     
-    english_story = generate_story(prompt, max_tokens=260)
-    
     # Translate to Hindi if requested
     if language.strip().lower() == "hindi":
-        return translate_to_hindi(english_story),english_story
+        return generate_translated_story(prompt, max_tokens=260, seed=seed, translator=translator,
+                                         should_stop=should_stop)
+    english_story = generate_story(prompt, max_tokens=260, seed=seed, should_stop=should_stop)
+    return english_story, english_story
+
+
+def warm_up_model() -> bool:
+    """Load the first model instance so the first story request does not pay for it."""
+    if STORY_ENGINE == "batch":
+        get_batch_engine().start()
     else:
-        return english_story, english_story
+        scheduler.warm_up()
+    return True
+
+
+def is_model_idle() -> bool:
+    """True when no story request is generating or waiting for the model."""
+    stats = get_scheduler_stats()
+    busy = stats.get("inflight", stats.get("active_sequences", 0))
+    return busy == 0 and stats.get("queue_depth", 0) == 0
+
+
+def has_waiting_requests() -> bool:
+    """True when a story request is queued for the model (all instances are busy)."""
+    return get_scheduler_stats().get("queue_depth", 0) > 0
+
+
+def get_generation_stats() -> dict:
+    """Return prompt-prefix reuse, story cache, early-stopping and translation counters."""
+    stats = prefix_cache.stats()
+    stats["prefix_reuse_enabled"] = PREFIX_REUSE and _prefix_reuse_supported
+    stats["story_cache"] = story_cache.stats()
+    stats["early_stopping"] = early_stop_stats.stats()
+    stats["translation_memory"] = translation_memory.stats() if TRANSLATION_MEMORY else {"enabled": False}
+    stats["translators"] = translation_router.stats()
+    return stats
+
+
+def get_scheduler_stats() -> dict:
+    """Return queue depth, in-flight count and wait times of the story model."""
+    if STORY_ENGINE == "batch":
+        return get_batch_engine().stats()
+    return scheduler.stats()
@@ -0,0 +1,117 @@
+# models/story_pool.py
+import threading
+import time
+from collections import deque
+
+
+class StoryPool:
+    """
+    Keeps a few ready, unused stories per key (e.g. (theme, language)).
+    take() pops one in O(1); a background worker refills the emptiest pool
+    whenever the story model has nothing else to do.
+
+    A refill gives way as soon as should_yield() returns True (a user request
+    is waiting for the model): the producer is called as
+    producer(*key, should_stop=...) and must abandon its work, by raising,
+    when should_stop() returns True.
+    """
+
+    def __init__(self, producer, keys, target_size: int = 1, is_idle=None, should_yield=None,
+                 idle_poll_seconds: float = 2.0):
+        self._producer = producer
+        self.target_size = max(0, int(target_size))
+        self._is_idle = is_idle or (lambda: True)
+        self._should_yield = should_yield or (lambda: False)
+        self._idle_poll_seconds = idle_poll_seconds
+        self._pools = {tuple(key): deque() for key in keys}
+        self._cond = threading.Condition()
+        self._thread = None
+
+        self.hits = 0
+        self.misses = 0
+        self.produced = 0
+        self.failures = 0
+        self.preempted = 0
+
+    def take(self, *key):
+        """Pop a ready story for key, or None if the pool is empty (or unknown)."""
+        pool = self._pools.get(key)
+        with self._cond:
+            if pool:
+                self.hits += 1
+                story = pool.popleft()
+                self._cond.notify()
+                return story
+            self.misses += 1
+            self._cond.notify()
+            return None
+
+    def start(self):
+        """Start the background refill worker (only once, and only if pooling is on)."""
+        with self._cond:
+            if self._thread is not None or self.target_size == 0 or not self._pools:
+                return
+            self._thread = threading.Thread(target=self._refill_loop, name="story-pool", daemon=True)
+            self._thread.start()
+
+    def _next_key_to_refill(self):
+        """The emptiest pool below target, or None when every pool is full."""
+        key = min(self._pools, key=lambda k: len(self._pools[k]))
+        return key if len(self._pools[key]) < self.target_size else None
+
+    def _refill_loop(self):
+        while True:
+            with self._cond:
+                key = self._next_key_to_refill()
+                while key is None:
+                    self._cond.wait()
+                    key = self._next_key_to_refill()
+
+            # Only use CPU that user-facing requests are not using
+            if not self._is_idle():
+                time.sleep(self._idle_poll_seconds)
+                continue
+
+            yielded = threading.Event()
+
+            def _should_stop():
+                if self._should_yield():
+                    yielded.set()
+                    return True
+                return False
+
+            try:
+                story = self._producer(*key, should_stop=_should_stop)
+            except Exception as e:
+                if yielded.is_set():
+                    print(f"⏸️ Story pool refill for {key} gave way to a waiting request")
+                    with self._cond:
+                        self.preempted += 1
+                    time.sleep(self._idle_poll_seconds)
+                    continue
+                print(f"⚠️ Story pool refill failed for {key}: {e}")
+                with self._cond:
+                    self.failures += 1
+                time.sleep(self._idle_poll_seconds)
+                continue
+
+            with self._cond:
+                self._pools[key].append(story)
+                self.produced += 1
+            print(f"📚 Story pool refilled {key} ({len(self._pools[key])}/{self.target_size})")
+
+    def stats(self) -> dict:
+        with self._cond:
+            ready = sum(len(pool) for pool in self._pools.values())
+            lookups = self.hits + self.misses
+            return {
+                "target_per_key": self.target_size,
+                "keys": len(self._pools),
+                "ready": ready,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "produced": self.produced,
+                "failures": self.failures,
+                "preempted": self.preempted,
+            }
@@ -0,0 +1,145 @@
+# models/text_segmenter.py
+import re
+
+# Shared sentence segmenter for English and Hindi story text. Everything is
+# compiled once at import; nothing is downloaded at runtime.
+
+SENTENCE_TERMINATORS = ".!?।॥"
+
+# A candidate boundary: terminators, optional closing quotes/brackets, whitespace
+_BOUNDARY = re.compile(r'[.!?।॥]+["\'”’)\]]*(?=\s|$)')
+_WORD_BEFORE_DOT = re.compile(r'(\S+)\.$')
+_PARAGRAPH_SPLIT = re.compile(r'\n\s*\n')
+_WHITESPACE = re.compile(r'\s+')
+
+# Abbreviations that end with a dot without ending the sentence. Ordinary
+# words ("no", "co", "est"...) are left out: they end sentences far more often.
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "mt", "ft", "lt",
+    "capt", "sgt", "vs", "etc", "e.g", "i.e", "approx", "dept", "govt",
+    "ltd", "inc", "smt", "shri", "rs",
+})
+
+_INITIAL = re.compile(r"[A-Z]\.$")
+_TOKEN_AFTER = re.compile(r"\s+(\S+)(?:\s+(\S+))?")
+
+
+def _is_initial(text: str, word: str, word_start: int, dot_end: int) -> bool:
+    """
+    A capital letter before a dot is an initial only in a name: the next word
+    is capitalised and either another initial is adjacent ("A. P. J. Abdul
+    Kalam") or a capitalised name precedes it ("George W. Bush").
+    "It was I. Then we left." stays two sentences.
+    """
+    if not word.isupper():
+        return False
+    following = _TOKEN_AFTER.match(text, dot_end)
+    if not following or not following.group(1)[:1].isupper():
+        return False
+    previous = text[:word_start].split()[-1:]
+    previous = previous[0].lstrip("\"'“‘(") if previous else ""
+    if _INITIAL.match(following.group(1)) or _INITIAL.match(previous):
+        return True
+    # A lone "I." or "A." is the pronoun/article ending a sentence
+    return word not in ("I", "A") and previous[:1].isupper() and previous[-1:].isalpha()
+
+
+def _is_abbreviation(text: str, dot_end: int) -> bool:
+    """True if the '.' ending at dot_end belongs to an abbreviation or an initial."""
+    match = _WORD_BEFORE_DOT.search(text, max(0, dot_end - 12), dot_end)
+    if not match:
+        return False
+    word = match.group(1).lstrip("\"'“‘(")
+    if len(word) == 1 and word.isalpha():
+        return _is_initial(text, word, match.start(1), dot_end)
+    # "No. 5" is a number sign, "no." anywhere else ends a sentence
+    if word.lower() == "no" and text[dot_end:dot_end + 2].lstrip()[:1].isdigit():
+        return True
+    return word.lower() in ABBREVIATIONS
+
+
+def _boundaries(text: str):
+    """Yield end offsets of sentence boundaries in text."""
+    for match in _BOUNDARY.finditer(text):
+        end = match.end()
+        terminator = match.group(0).rstrip("\"'”’)]")
+        if terminator == "." and _is_abbreviation(text, match.start() + 1):
+            continue
+        # '"Wow!" she said' continues the sentence when the next word is lowercase
+        next_char = text[end:end + 2].lstrip()[:1]
+        if terminator[-1] in ".!?" and next_char.islower():
+            continue
+        yield end
+
+
+def split_sentences(text: str) -> list:
+    """Split English or Hindi text into sentences, keeping their punctuation."""
+    if not text:
+        return []
+    sentences = []
+    start = 0
+    for end in _boundaries(text):
+        sentence = _WHITESPACE.sub(" ", text[start:end]).strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+    tail = _WHITESPACE.sub(" ", text[start:]).strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def complete_sentences(text: str) -> list:
+    """
+    Sentences that are certainly finished: a boundary has been followed by more text.
+    Useful on streaming output, where the last piece may still grow.
+    """
+    sentences = []
+    start = 0
+    for end in _boundaries(text):
+        if end >= len(text):
+            # Nothing after the terminator yet; "Mr." or "3." could still continue
+            break
+        sentence = _WHITESPACE.sub(" ", text[start:end]).strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+    return sentences
+
+
+def sentence_end_offsets(text: str) -> list:
+    """End offsets of the finished sentences in text (see complete_sentences)."""
+    return [end for end in _boundaries(text) if end < len(text)]
+
+
+def count_sentences(text: str) -> int:
+    """Number of finished sentences in text (see complete_sentences)."""
+    return len(sentence_end_offsets(text))
+
+
+def split_paragraphs(text: str) -> list:
+    """Split text on blank lines."""
+    return [p.strip() for p in _PARAGRAPH_SPLIT.split(text or "") if p.strip()]
+
+
+def group_sentences(sentences: list, per_group: int, final: bool = True) -> list:
+    """
+    Join consecutive sentences into paragraphs of per_group sentences.
+    With final=False a trailing, not yet full group is left out.
+    """
+    per_group = max(1, per_group)
+    groups = [
+        " ".join(sentences[i:i + per_group])
+        for i in range(0, len(sentences), per_group)
+    ]
+    if not final and groups and len(sentences) % per_group:
+        groups.pop()
+    return groups
+
+
+def ensure_terminated(sentence: str, terminator: str = ".") -> str:
+    """Add a terminator to a sentence that lost its final punctuation."""
+    sentence = sentence.rstrip()
+    if sentence and sentence.rstrip("\"'”’)]")[-1:] not in SENTENCE_TERMINATORS:
+        return sentence + terminator
+    return sentence
@@ -0,0 +1,295 @@
+# models/translation.py
+import abc
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http_client import http
+
+# Translation goes through pluggable backends with failover (see TranslatorRouter).
+# The HTTP backend packs sentences into size-bounded chunks that are translated
+# in parallel over the shared keep-alive client (http_client), so latency
+# follows the slowest chunk instead of the sum and no request gets near URL
+# length limits.
+TRANSLATE_URL = "https://translate.googleapis.com/translate_a/single"
+TRANSLATE_TIMEOUT = float(os.getenv("TRANSLATE_TIMEOUT", "5"))
+TRANSLATE_MAX_CHUNK_CHARS = int(os.getenv("TRANSLATE_MAX_CHUNK_CHARS", "800"))
+TRANSLATE_MAX_WORKERS = int(os.getenv("TRANSLATE_MAX_WORKERS", "4"))
+
+PHRASE_TABLE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "phrase_tables")
+
+_executor = ThreadPoolExecutor(max_workers=TRANSLATE_MAX_WORKERS, thread_name_prefix="translate")
+
+
+def chunk_sentences(sentences: list, max_chars: int = TRANSLATE_MAX_CHUNK_CHARS) -> list:
+    """
+    Pack consecutive sentences into chunks of at most max_chars (one line per
+    sentence). A sentence longer than max_chars gets a chunk of its own.
+    """
+    chunks, current, size = [], [], 0
+    for sentence in sentences:
+        if current and size + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence) + (1 if size else 0)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def translate_chunk(text: str, target: str = "hi", source: str = "en") -> str:
+    """Translate one chunk; raises on HTTP errors or an empty translation."""
+    params = {
+        'client': 'gtx',
+        'sl': source,
+        'tl': target,
+        'dt': 't',   # return translation
+        'q': text,
+    }
+    # One quick retry; slower recovery is the router's job (failover)
+    response = http.get(
+        TRANSLATE_URL, params=params, timeout=TRANSLATE_TIMEOUT,
+        deadline=TRANSLATE_TIMEOUT * 2, retries=1,
+    )
+    result = response.json()
+
+    translated_text = ""
+    if result and len(result) > 0 and result[0]:
+        for translation_part in result[0]:
+            if translation_part and translation_part[0]:
+                translated_text += translation_part[0]
+    if not translated_text.strip():
+        raise ValueError("Empty translation")
+    return translated_text.strip()
+
+
+def _translate_lines(lines: list, target: str, source: str) -> list:
+    """
+    Translate a chunk of sentences sent as one newline-separated request.
+    If the translation does not keep one line per sentence, fall back to
+    translating the sentences one by one so results still line up.
+    """
+    if len(lines) == 1:
+        return [translate_chunk(lines[0], target, source)]
+    translated = [line.strip() for line in translate_chunk("\n".join(lines), target, source).split("\n")]
+    translated = [line for line in translated if line]
+    if len(translated) == len(lines):
+        return translated
+    return [translate_chunk(line, target, source) for line in lines]
+
+
+class TranslatorBackend(abc.ABC):
+    """
+    A way to translate sentences. translate() returns one translation per
+    input sentence, in order, and raises when it cannot translate.
+    memoize says whether results are good enough for the translation memory.
+    """
+
+    name = "base"
+    memoize = True
+
+    @abc.abstractmethod
+    def translate(self, sentences: list, target: str, source: str) -> list:
+        """Translate sentences from source to target language."""
+
+
+class GoogleTranslateBackend(TranslatorBackend):
+    """The free translate.googleapis.com endpoint, in parallel size-bounded chunks."""
+
+    name = "google"
+
+    def translate(self, sentences: list, target: str, source: str) -> list:
+        chunks = chunk_sentences(sentences)
+        if not chunks:
+            return []
+        if len(chunks) == 1:
+            return _translate_lines(chunks[0], target, source)
+        futures = [_executor.submit(_translate_lines, chunk, target, source) for chunk in chunks]
+        return [line for future in futures for line in future.result()]
+
+
+class PhraseTableBackend(TranslatorBackend):
+    """
+    Offline word/phrase substitution from data/phrase_tables/<source>-<target>.json.
+    Rough compared to a real translator, but needs no network, so Hindi
+    stories still work in air-gapped deployments.
+    """
+
+    name = "offline"
+    memoize = False
+    _TOKEN = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?|\d+|[^\sA-Za-z\d]")
+
+    def __init__(self, directory: str = PHRASE_TABLE_DIR):
+        self.directory = directory
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _table(self, source: str, target: str) -> tuple:
+        """(entries, punctuation, longest phrase in words) for a language pair, loaded once."""
+        with self._lock:
+            if (source, target) not in self._tables:
+                path = os.path.join(self.directory, f"{source}-{target}.json")
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                entries = {}
+                for section in ("words", "phrases"):
+                    for english, translated in data.get(section, {}).items():
+                        entries[tuple(english.lower().split())] = translated
+                longest = max((len(phrase) for phrase in entries), default=1)
+                self._tables[(source, target)] = (entries, data.get("punctuation", {}), longest)
+            return self._tables[(source, target)]
+
+    def translate(self, sentences: list, target: str, source: str) -> list:
+        entries, punctuation, longest = self._table(source, target)
+        return [self._translate_sentence(s, entries, punctuation, longest) for s in sentences]
+
+    def _translate_sentence(self, sentence: str, entries: dict, punctuation: dict, longest: int) -> str:
+        tokens = self._TOKEN.findall(sentence)
+        lowered = [token.lower() for token in tokens]
+        words = []
+        i = 0
+        while i < len(tokens):
+            # Longest phrase starting here wins
+            for size in range(min(longest, len(tokens) - i), 0, -1):
+                phrase = tuple(lowered[i:i + size])
+                if phrase in entries:
+                    if entries[phrase]:
+                        words.append(entries[phrase])
+                    i += size
+                    break
+            else:
+                token = tokens[i]
+                if token in punctuation or not token[0].isalnum():
+                    mark = punctuation.get(token, token)
+                    if words:
+                        words[-1] += mark
+                    else:
+                        words.append(mark)
+                else:
+                    words.append(token)
+                i += 1
+        return " ".join(words)
+
+
+class StubBackend(TranslatorBackend):
+    """Deterministic backend for tests: a fixed mapping, else "[target] sentence"."""
+
+    name = "stub"
+    memoize = False
+
+    def __init__(self, translations: dict = None):
+        self.translations = translations or {}
+
+    def translate(self, sentences: list, target: str, source: str) -> list:
+        return [self.translations.get(s, f"[{target}] {s}") for s in sentences]
+
+
+class TranslatorRouter:
+    """
+    Tries backends in preference order. A backend that fails, or whose
+    average latency goes over the latency budget, is cooled down and moved
+    behind the others; the cooldown doubles while it keeps failing.
+    """
+
+    def __init__(self, backends: list, order: list, latency_budget: float, cooldown_seconds: float):
+        self.backends = {backend.name: backend for backend in backends}
+        self.order = [name for name in order if name in self.backends]
+        self.latency_budget = latency_budget
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._health = {
+            name: {"calls": 0, "failures": 0, "ewma_seconds": None, "strikes": 0, "cooldown_until": 0.0}
+            for name in self.backends
+        }
+
+    def _candidates(self, preferred: str = None) -> list:
+        order = list(self.order)
+        if preferred:
+            if preferred not in self.backends:
+                raise ValueError(f"Unknown translator: {preferred}")
+            order = [preferred] + [name for name in order if name != preferred]
+        now = time.monotonic()
+        with self._lock:
+            # Stable sort: healthy backends first, preference order within each group
+            return sorted(order, key=lambda name: self._health[name]["cooldown_until"] > now)
+
+    def _record(self, name: str, seconds: float, failed: bool):
+        with self._lock:
+            health = self._health[name]
+            health["calls"] += 1
+            if not failed:
+                previous = health["ewma_seconds"]
+                health["ewma_seconds"] = seconds if previous is None else 0.7 * previous + 0.3 * seconds
+            else:
+                health["failures"] += 1
+            if failed or health["ewma_seconds"] > self.latency_budget:
+                health["strikes"] += 1
+                cooldown = min(self.cooldown_seconds * 2 ** (health["strikes"] - 1), 600.0)
+                health["cooldown_until"] = time.monotonic() + cooldown
+                if not failed:
+                    # Start from a clean average when it gets another chance
+                    health["ewma_seconds"] = None
+            else:
+                health["strikes"] = 0
+
+    def translate(self, sentences: list, target: str = "hi", source: str = "en", preferred: str = None) -> tuple:
+        """Return (translations, backend) from the first backend that succeeds."""
+        errors = []
+        for name in self._candidates(preferred):
+            backend = self.backends[name]
+            started = time.perf_counter()
+            try:
+                translated = backend.translate(sentences, target, source)
+                if len(translated) != len(sentences):
+                    raise ValueError(f"{name} returned {len(translated)} lines for {len(sentences)} sentences")
+            except Exception as e:
+                self._record(name, time.perf_counter() - started, failed=True)
+                print(f"⚠️ Translator {name} failed, trying the next one: {e}")
+                errors.append(f"{name}: {e}")
+                continue
+            self._record(name, time.perf_counter() - started, failed=False)
+            return translated, backend
+        raise RuntimeError("All translators failed: " + "; ".join(errors))
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "order": list(self.order),
+                "backends": {
+                    name: {
+                        "calls": health["calls"],
+                        "failures": health["failures"],
+                        "avg_latency_seconds": round(health["ewma_seconds"], 3) if health["ewma_seconds"] is not None else None,
+                        "cooling_down": health["cooldown_until"] > now,
+                    }
+                    for name, health in self._health.items()
+                },
+            }
+
+
+# TRANSLATE_BACKENDS is the failover order; TRANSLATE_BACKENDS=offline never
+# touches the network. The "stub" backend is only registered (and selectable
+# per request) with TRANSLATE_ENABLE_STUB=1, so it never answers real users.
+TRANSLATE_ENABLE_STUB = os.getenv("TRANSLATE_ENABLE_STUB", "0") == "1"
+
+router = TranslatorRouter(
+    [GoogleTranslateBackend(), PhraseTableBackend()] + ([StubBackend()] if TRANSLATE_ENABLE_STUB else []),
+    order=os.getenv("TRANSLATE_BACKENDS", "google,offline").split(","),
+    latency_budget=float(os.getenv("TRANSLATE_LATENCY_BUDGET", "4")),
+    cooldown_seconds=float(os.getenv("TRANSLATE_COOLDOWN", "30")),
+)
+
+
+def translate_sentences(sentences: list, target: str = "hi", source: str = "en", backend: str = None) -> tuple:
+    """
+    Translate a list of sentences, returning (translations, backend) with one
+    translation per sentence in order. backend picks the translator to try
+    first; the others are used as failover. Raises if every backend fails.
+    """
+    if not sentences:
+        return [], None
+    return router.translate(sentences, target, source, preferred=backend)
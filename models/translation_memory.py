@@ -0,0 +1,99 @@
+# models/translation_memory.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Canonical form of a source sentence: NFC, single spaces, no outer whitespace."""
+    return " ".join(unicodedata.normalize("NFC", sentence).split())
+
+
+class TranslationMemory:
+    """
+    Sentence-level translation store in SQLite. Entries are keyed on the hash
+    of the normalized source sentence, the target language and a version
+    string, so changing the post-processing tables invalidates old entries.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._entries = 0  # row count, loaded in _connect and kept up to date
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, target TEXT NOT NULL, "
+                "translation TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._entries = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def key(sentence: str, target: str, version: str) -> str:
+        digest = hashlib.sha256(normalize_sentence(sentence).encode("utf-8")).hexdigest()
+        return f"{target}:{version}:{digest}"
+
+    def get_many(self, keys: list) -> dict:
+        """Look up many keys in one query; returns {key: translation} for the hits."""
+        unique = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                found.update(rows)
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, entries: dict, target: str):
+        """Store {key: translation} pairs."""
+        if not entries:
+            return
+        now = time.time()
+        keys = list(entries)
+        with self._lock:
+            conn = self._connect()
+            existing = 0
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                existing += conn.execute(
+                    f"SELECT COUNT(*) FROM translations WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, target, translation, created) VALUES (?, ?, ?, ?)",
+                [(key, target, translation, now) for key, translation in entries.items()],
+            )
+            conn.commit()
+            self._entries += len(keys) - existing
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._connect()
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -1,19 +1,229 @@
+import json
 import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
-from elevenlabs import generate, save, set_api_key
+from metrics import instrument_stage, track_stage
+from http_client import http
+from models.text_segmenter import split_sentences
+from models.translation_memory import normalize_sentence
+from caching import FileCache, make_cache_key
+from warmup import mark_ready
 
 # Load environment variables
 load_dotenv()
-api_key = os.getenv("ELEVENLABS_API_KEY")
 
-if not api_key:
-    raise ValueError("ELEVENLABS_API_KEY is missing from .env file")
+# Narration goes through the ElevenLabs REST API on the shared HTTP client.
+# The key is checked on first use (or by the startup warm-up), so a missing
+# key degrades narration instead of stopping the server.
+ELEVENLABS_TTS_URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+TTS_MODEL = "eleven_multilingual_v2"
+TTS_REQUEST_TIMEOUT = float(os.getenv("TTS_REQUEST_TIMEOUT", "60"))
+TTS_DEADLINE = float(os.getenv("TTS_DEADLINE", "180"))
+# ElevenLabs default output is constant-bitrate MP3, so chunk files can be
+# joined without re-encoding and their length follows from their size
+TTS_OUTPUT_FORMAT = "mp3_44100_128"
+TTS_BITRATE = 128_000
 
-print("ELEVENLABS_API_KEY loaded successfully.")
+# Long narration is split into sentence-aligned chunks of at most
+# NARRATION_CHUNK_CHARS that are synthesized TTS_CONCURRENCY at a time and
+# joined in order, so latency follows the slowest chunk, not the story length
+NARRATION_CHUNK_CHARS = int(os.getenv("NARRATION_CHUNK_CHARS", "400"))
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "3"))
+_tts_executor = ThreadPoolExecutor(max_workers=TTS_CONCURRENCY, thread_name_prefix="tts")
 
+# Synthesized chunks are cached on (normalized text, voice id, model), so
+# repeated stories and the unchanged parts of edited ones skip the API and
+# its quota. NARRATION_CACHE=0 disables the cache.
+NARRATION_CACHE = os.getenv("NARRATION_CACHE", "1") != "0"
+audio_cache = FileCache(
+    "audio",
+    max_bytes=int(os.getenv("NARRATION_CACHE_MAX_MB", "200")) * 1024 * 1024,
+    suffix=".mp3",
+)
 
-# Set API key globally
-set_api_key(api_key)
+_tts_lock = threading.Lock()
+_tts_api_key = None
+
+
+def ensure_tts_client() -> bool:
+    """
+    Load the ElevenLabs API key once.
+    Raises ValueError if ELEVENLABS_API_KEY is not configured.
+    """
+    global _tts_api_key
+    if _tts_api_key:
+        return True
+
+    with _tts_lock:
+        if _tts_api_key:
+            return True
+
+        api_key = os.getenv("ELEVENLABS_API_KEY")
+        if not api_key:
+            raise ValueError("ELEVENLABS_API_KEY is missing from .env file")
+
+        print("ELEVENLABS_API_KEY loaded successfully.")
+        _tts_api_key = api_key
+    mark_ready("tts")
+    return True
+
+
+def synthesize_speech(text: str, voice_id: str, filename: str) -> str:
+    """Render text with an ElevenLabs voice and stream the MP3 to filename."""
+    ensure_tts_client()
+    return http.download(
+        ELEVENLABS_TTS_URL.format(voice_id=voice_id),
+        filename,
+        method="POST",
+        params={"output_format": TTS_OUTPUT_FORMAT},
+        headers={"xi-api-key": _tts_api_key, "Accept": "audio/mpeg"},
+        json={"text": text, "model_id": TTS_MODEL},
+        timeout=TTS_REQUEST_TIMEOUT,
+        deadline=TTS_DEADLINE,
+        # Same text and voice give the same audio, so retrying is safe
+        idempotent=True,
+    )
+
+
+def _is_cut_point(sentence: str) -> bool:
+    """Whether a chunk may end after this sentence; decided by the sentence alone."""
+    return int(make_cache_key(normalize_sentence(sentence))[:8], 16) % 3 == 0
+
+
+def split_narration(text: str, max_chars: int = NARRATION_CHUNK_CHARS) -> list:
+    """
+    Split narration into chunks of whole sentences, each at most max_chars
+    (unless one sentence is longer). Once a chunk is half full it also ends
+    after any sentence that is a cut point, so chunk boundaries depend on
+    nearby sentences only: editing a sentence changes its own chunk and
+    the chunks after the next cut point keep their cached audio.
+    """
+    chunks, current, size = [], [], 0
+    for sentence in split_sentences(text):
+        if current and size + 1 + len(sentence) > max_chars:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence) + (1 if size else 0)
+        if size >= max_chars // 2 and _is_cut_point(sentence):
+            chunks.append(" ".join(current))
+            current, size = [], 0
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def narration_cache_key(text: str, voice_id: str) -> str:
+    return make_cache_key("tts", normalize_sentence(text), voice_id, TTS_MODEL, TTS_OUTPUT_FORMAT)
+
+
+def get_audio_cache_stats() -> dict:
+    """Hit/miss counters and disk usage of the narration cache."""
+    return audio_cache.stats() if NARRATION_CACHE else {"enabled": False}
+
+
+def audio_duration(path: str) -> float:
+    """Length of an MP3 in seconds: ffprobe when available, else from the constant bitrate."""
+    if shutil.which("ffprobe"):
+        try:
+            with track_stage("ffprobe"):
+                result = subprocess.run([
+                    "ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", path
+                ], capture_output=True, text=True, check=True)
+            return float(json.loads(result.stdout)["format"]["duration"])
+        except Exception as e:
+            print(f"⚠️ ffprobe failed on {path}, estimating duration: {e}")
+    return os.path.getsize(path) * 8 / TTS_BITRATE
+
+
+def concat_audio(parts: list, filename: str) -> str:
+    """
+    Join MP3 files in order without re-encoding: ffmpeg's concat demuxer with
+    stream copy when available, else plain frame concatenation (valid for
+    same-format constant-bitrate MP3).
+    """
+    if shutil.which("ffmpeg"):
+        list_path = f"{filename}.concat.txt"
+        try:
+            with open(list_path, "w", encoding="utf-8") as f:
+                for part in parts:
+                    escaped = os.path.abspath(part).replace("\\", "/").replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            with track_stage("ffmpeg") as call:
+                result = subprocess.run([
+                    "ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0",
+                    "-i", list_path, "-c", "copy", filename
+                ], capture_output=True, text=True)
+                if result.returncode != 0:
+                    call.fail()
+            if result.returncode == 0:
+                return filename
+            print(f"⚠️ ffmpeg concat failed, joining frames directly: {result.stderr.strip()[:200]}")
+        finally:
+            if os.path.exists(list_path):
+                os.remove(list_path)
+
+    tmp_path = f"{filename}.{threading.get_ident()}.part"
+    try:
+        with open(tmp_path, "wb") as out:
+            for part in parts:
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp_path, filename)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return filename
+
+
+def _synthesize_chunk(text: str, voice_id: str, path: str) -> dict:
+    """Synthesize one chunk to path, from the narration cache when possible."""
+    key = narration_cache_key(text, voice_id) if NARRATION_CACHE else None
+    if key is not None and audio_cache.fetch(key, path):
+        print(f"📦 Narration cache hit: {text[:40]}...")
+    else:
+        synthesize_speech(text, voice_id, path)
+        if key is not None:
+            audio_cache.store(key, path)
+    return {"text": text, "duration": round(audio_duration(path), 3)}
+
+
+def narrate(text: str, voice_id: str, filename: str, chunks: list = None) -> tuple:
+    """
+    Synthesize narration chunk by chunk in parallel and join it into filename.
+    chunks (e.g. video scenes) overrides the sentence-based split of text.
+    Returns (filename, timings) with one {"text", "start", "duration"} entry
+    per chunk, in order, measured from the audio itself.
+    """
+    chunks = [c for c in (chunks or []) if c.strip()] or split_narration(text) or [text]
+    base, ext = os.path.splitext(filename)
+    if len(chunks) == 1:
+        timings = [_synthesize_chunk(chunks[0], voice_id, filename)]
+    else:
+        part_paths = [f"{base}.part{n:02d}{ext}" for n in range(len(chunks))]
+        try:
+            futures = [
+                _tts_executor.submit(_synthesize_chunk, chunk, voice_id, path)
+                for chunk, path in zip(chunks, part_paths)
+            ]
+            # Let every chunk finish before the parts are cleaned up, even on failure
+            wait(futures)
+            timings = [future.result() for future in futures]
+            concat_audio(part_paths, filename)
+        finally:
+            for path in part_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+        print(f"🔊 Narrated {len(chunks)} chunks in parallel")
+
+    start = 0.0
+    for timing in timings:
+        timing["start"] = round(start, 3)
+        start += timing["duration"]
+    return filename, timings
 
 
 # # Initialize ElevenLabs client
@@ -54,26 +264,24 @@ CULTURAL_THEMES = {
     "adventure": "Cultural adventures and journeys"
 }
 
-def generate_audio(text: str, filename="story_audio.mp3", language="English") -> str:
+@instrument_stage("generate_audio")
+def generate_audio(text: str, filename="story_audio.mp3", language="English", return_timings=False, chunks=None):
     """
     Generate audio narration with multi-language support.
     Optimized for cultural storytelling.
+    With return_timings, returns (path, per-chunk timings) instead of the path;
+    chunks splits the narration on given boundaries (see narrate).
     """
     try:
         # Select appropriate voice for language
         voice = VOICE_MAPPING.get(language, VOICE_MAPPING["English"])
         
-        audio = generate(
-            text=text,
-            voice=voice,
-            model="eleven_multilingual_v2"
-        )
-
-        save(audio, filename)
-        return filename
+        path, timings = narrate(text, voice, filename, chunks)
+        return (path, timings) if return_timings else path
 
     except Exception as e:
-        return f"Error generating audio: {e}"
+        error = f"Error generating audio: {e}"
+        return (error, []) if return_timings else error
     
 
 def get_cultural_themes():
@@ -104,9 +312,13 @@ def detect_regional_accent(culture: str, region: str = None) -> str:
     # Default to standard Hindi
     return "Hindi"
 
-def generate_audio_with_accent(text: str, culture: str = "Indian", region: str = None, filename="story_audio.mp3") -> str:
+@instrument_stage("generate_audio_with_accent")
+def generate_audio_with_accent(text: str, culture: str = "Indian", region: str = None, filename="story_audio.mp3",
+                               return_timings=False, chunks=None):
     """
     Generate audio with appropriate Indian regional accent.
+    With return_timings, returns (path, per-chunk timings) instead of the path;
+    chunks splits the narration on given boundaries (see narrate).
     """
     try:
         # Detect appropriate accent
@@ -115,17 +327,12 @@ def generate_audio_with_accent(text: str, culture: str = "Indian", region: str =
         # Select appropriate voice for detected accent
         voice = VOICE_MAPPING.get(language, VOICE_MAPPING["English"])
         
-        audio = generate(
-            text=text,
-            voice=voice,
-            model="eleven_multilingual_v2"
-        )
-
-        save(audio, filename)
-        return filename
+        path, timings = narrate(text, voice, filename, chunks)
+        return (path, timings) if return_timings else path
 
     except Exception as e:
-        return f"Error generating audio: {e}"
+        error = f"Error generating audio: {e}"
+        return (error, []) if return_timings else error
 
 def generate_cultural_facts(culture: str) -> str:
     """
@@ -8,9 +8,54 @@ import requests
 import json
 import time
 import os
+import subprocess
+import sys
 
 API_BASE = "http://localhost:5000/api"
 
+# Importing app.py must stay cheap: the model and TTS client load
+# lazily or in the background warm-up, never at import time.
+IMPORT_TIME_BUDGET_SECONDS = 2.0
+HEAVY_MODULES = ("gpt4all", "elevenlabs", "nltk")
+
+def test_import_time_budget():
+    """Test that importing the backend stays within the cold-start budget."""
+    print("⏱️ Testing backend import time...")
+    try:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=120
+        )
+        if result.returncode != 0:
+            print(f"❌ Importing app failed:\n{result.stderr[-500:]}")
+            return False
+
+        # Lines look like: "import time:  self [us] | cumulative | imported package"
+        cumulative_us = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "imported package" in line:
+                continue
+            _, cumulative, package = line[len("import time:"):].split("|")
+            cumulative_us[package.strip()] = int(cumulative)
+
+        app_seconds = cumulative_us.get("app", 0) / 1_000_000
+        heavy = [name for name in HEAVY_MODULES if name in cumulative_us]
+        print(f"   import app: {app_seconds:.2f}s (budget {IMPORT_TIME_BUDGET_SECONDS:.1f}s)")
+
+        if heavy:
+            print(f"❌ Heavy modules imported at startup: {', '.join(heavy)}")
+            return False
+        if app_seconds > IMPORT_TIME_BUDGET_SECONDS:
+            print("❌ Backend import is over budget")
+            return False
+        print("✅ Backend imports within budget")
+        return True
+
+    except Exception as e:
+        print(f"❌ Import time test error: {e}")
+        return False
+
 def test_health_check():
     """Test if the backend is running and healthy."""
     print("🔍 Testing health check...")
@@ -21,6 +66,17 @@ def test_health_check():
             print("✅ Backend is healthy!")
             print(f"   Status: {data['status']}")
             print(f"   Features: {', '.join(data['features'])}")
+            for name, component in data.get('components', {}).items():
+                print(f"   {name}: {component['state']}")
+            early_stopping = data.get('story_generation', {}).get('early_stopping', {})
+            if early_stopping:
+                print(f"   Early stopping: {early_stopping.get('tokens_saved', 0)} tokens saved "
+                      f"over {early_stopping.get('generations', 0)} generations")
+            scheduler = data.get('story_scheduler', {})
+            if scheduler:
+                print(f"   Story scheduler: {scheduler.get('inflight', 0)} in flight, "
+                      f"{scheduler.get('queue_depth', 0)} queued, "
+                      f"avg wait {scheduler.get('avg_wait_seconds', 0)}s")
             return True
         else:
             print(f"❌ Health check failed: {response.status_code}")
@@ -99,6 +155,87 @@ def test_basic_story():
         print(f"❌ Error in basic story test: {e}")
         return False
 
+def test_streaming_story():
+    """Test server-sent event streaming of a basic story."""
+    print("\n📡 Testing streaming story generation...")
+
+    payload = {
+        "text": "a little lamp that lights up a village during Diwali",
+        "language": "English"
+    }
+
+    try:
+        started = time.time()
+        first_token_at = None
+        scenes = 0
+        story = None
+        event = None
+
+        with requests.post(f"{API_BASE}/story/stream", json=payload, stream=True, timeout=120) as response:
+            if response.status_code != 200:
+                print(f"❌ Streaming request failed: {response.status_code}")
+                return False
+
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+                    if event == "token" and first_token_at is None:
+                        first_token_at = time.time() - started
+                    elif event == "scene":
+                        scenes += 1
+                    elif event == "done":
+                        story = data["story"]
+                    elif event == "error":
+                        print(f"❌ Stream reported an error: {data['error']}")
+                        return False
+
+        if story:
+            print("✅ Streaming story generated successfully!")
+            print(f"   Time to first token: {first_token_at:.2f}s" if first_token_at else "   No token events received")
+            print(f"   Total time: {time.time() - started:.2f}s, {scenes} scene events")
+            print(f"   Story length: {len(story)} characters")
+            return True
+        print("❌ Stream ended without a done event")
+        return False
+
+    except Exception as e:
+        print(f"❌ Error in streaming story test: {e}")
+        return False
+
+def test_seeded_story_cache():
+    """Test that a repeated seeded request is served from the story cache."""
+    print("\n📦 Testing seeded story cache...")
+
+    payload = {"theme": "wisdom", "culture": "Indian", "language": "English", "seed": 7}
+
+    try:
+        timings = []
+        stories = []
+        for _ in range(2):
+            started = time.time()
+            response = requests.post(f"{API_BASE}/cultural-story", json=payload, timeout=120)
+            timings.append(time.time() - started)
+            if response.status_code != 200:
+                print(f"❌ Seeded story request failed: {response.json().get('error', 'Unknown error')}")
+                return False
+            stories.append(response.json()["story"])
+
+        print(f"   First request: {timings[0]:.1f}s, repeated request: {timings[1]:.1f}s")
+        cache = requests.get(f"{API_BASE}/health", timeout=10).json().get("story_generation", {}).get("story_cache", {})
+        print(f"   Story cache hit rate: {cache.get('hit_rate', 0)}")
+
+        if stories[0] == stories[1]:
+            print("✅ Same seed returned the same story")
+            return True
+        print("❌ Same seed returned different stories")
+        return False
+
+    except Exception as e:
+        print(f"❌ Error in seeded story cache test: {e}")
+        return False
+
 def test_cultural_story():
     """Test cultural story generation."""
     print("\n🌍 Testing cultural story generation...")
@@ -144,6 +281,46 @@ def test_cultural_story():
         print(f"❌ Error in cultural story test: {e}")
         return False
 
+def test_concurrent_stories():
+    """Test that parallel story requests are all served by the shared model."""
+    print("\n🧵 Testing concurrent story generation...")
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    prompts = [
+        "a clever crow who outwits a greedy king",
+        "a young weaver preparing for the Diwali fair",
+        "an elephant who guards a mountain temple",
+    ]
+
+    def post_story(prompt):
+        payload = {"text": prompt, "language": "English"}
+        return requests.post(f"{API_BASE}/story", json=payload, timeout=300)
+
+    try:
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+            responses = list(pool.map(post_story, prompts))
+        elapsed = time.time() - started
+
+        ok = [r for r in responses if r.status_code == 200 and not r.json()["story"].startswith("Error")]
+        print(f"   {len(ok)}/{len(prompts)} stories generated in {elapsed:.1f}s")
+
+        health = requests.get(f"{API_BASE}/health", timeout=10).json()
+        scheduler = health.get("story_scheduler", {})
+        print(f"   Scheduler: completed={scheduler.get('completed')}, "
+              f"max wait={scheduler.get('max_wait_seconds')}s")
+
+        if len(ok) == len(prompts):
+            print("✅ All concurrent stories generated successfully!")
+            return True
+        print("❌ Some concurrent story requests failed")
+        return False
+
+    except Exception as e:
+        print(f"❌ Error in concurrent story test: {e}")
+        return False
+
 def test_themed_image():
     """Test themed image generation."""
     print("\n🖼️ Testing themed image generation...")
@@ -179,17 +356,158 @@ def test_themed_image():
         print(f"❌ Error in themed image test: {e}")
         return False
 
+def test_metrics_endpoint():
+    """Test the Prometheus metrics endpoint after the story tests have run."""
+    print("📈 Testing metrics endpoint...")
+    try:
+        response = requests.get(f"{API_BASE}/metrics", timeout=10)
+        if response.status_code != 200:
+            print(f"❌ Metrics failed: {response.status_code}")
+            return False
+        text = response.text
+        expected = [
+            "# TYPE storyteller_stage_duration_seconds histogram",
+            'storyteller_stage_requests_total{stage="llm_generate"}',
+            "storyteller_llm_time_to_first_token_seconds_count",
+        ]
+        missing = [line for line in expected if line not in text]
+        if missing:
+            print(f"❌ Metrics missing: {missing}")
+            return False
+        for line in text.splitlines():
+            if line.startswith(("storyteller_stage_requests_total", "storyteller_stage_error_ratio")):
+                print(f"   {line}")
+        print("✅ Metrics endpoint OK")
+        return True
+    except Exception as e:
+        print(f"❌ Metrics error: {e}")
+        return False
+
+def test_sentence_splitting():
+    """Test the sentence splitter on abbreviations, initials and short words (no server needed)."""
+    print("✂️ Testing sentence splitting...")
+    from models.text_segmenter import split_sentences
+    cases = {
+        "She said no. He left at once.": ["She said no.", "He left at once."],
+        "It was I. Then we left.": ["It was I.", "Then we left."],
+        "It was plan B. Everyone agreed.": ["It was plan B.", "Everyone agreed."],
+        "They formed a co. Then they sold it.": ["They formed a co.", "Then they sold it."],
+        "A. P. J. Abdul Kalam was born in Rameswaram. He became president.":
+            ["A. P. J. Abdul Kalam was born in Rameswaram.", "He became president."],
+        "George W. Bush spoke. Dr. Rao listened.": ["George W. Bush spoke.", "Dr. Rao listened."],
+        "राजा ने कहा। सब खुश थे।": ["राजा ने कहा।", "सब खुश थे।"],
+    }
+    failed = False
+    for text, expected in cases.items():
+        result = split_sentences(text)
+        if result != expected:
+            print(f"❌ {text!r} split into {result}")
+            failed = True
+    if not failed:
+        print("✅ Sentence splitting OK")
+    return not failed
+
+def test_scene_planner():
+    """Test that scene planning keeps every sentence and respects the time budget (no server needed)."""
+    print("🗂️ Testing scene planner...")
+    from models.scene_planner import group_sentences, plan_scenes, SCENE_IMAGE_SECONDS
+    sentences = [f"Sentence {i} " + "word " * (3 + i * 7 % 11) + "ends." for i in range(17)]
+    failed = False
+    for count in range(1, len(sentences) + 2):
+        groups = group_sentences(sentences, count)
+        flattened = [sentence for group in groups for sentence in group]
+        if flattened != sentences or len(groups) != min(count, len(sentences)) or not all(groups):
+            print(f"❌ group_sentences(..., {count}) lost, repeated or reordered sentences")
+            failed = True
+
+    plan = plan_scenes(sentences, max_images=8, min_words=1, time_budget=2 * SCENE_IMAGE_SECONDS, concurrency=1)
+    if len(plan["scenes"]) != 2 or sum(plan["sentence_counts"]) != len(sentences):
+        print(f"❌ Plan not capped by the time budget: {plan['sentence_counts']}")
+        failed = True
+    plan = plan_scenes(sentences, max_images=8, min_words=1)
+    if len(plan["scenes"]) != 8 or len(plan["durations"]) != 8:
+        print(f"❌ Plan not capped by max_images: {len(plan['scenes'])} scenes")
+        failed = True
+    if not failed:
+        print("✅ Scene planner OK")
+    return not failed
+
+def test_prompt_index():
+    """Test near-duplicate prompt lookup: threshold, group and removal (no server needed)."""
+    print("🔎 Testing prompt index...")
+    import tempfile
+    from models.prompt_index import PromptIndex
+    prompt = "Scene 1: A young girl feeds peacocks in a royal palace garden at dawn."
+    near = "Scene 4: A young girl feeds the peacocks in a royal palace garden at dawn."
+    changed = "Scene 1: A young girl feeds peacocks in a royal palace garden at dusk."
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "prompts.sqlite3")
+        index = PromptIndex(path, threshold=0.8)
+        index.add(prompt, "storybook|1280x720", "key-1")
+        checks = [
+            ("near-identical prompt", index.find(near, "storybook|1280x720"), "key-1"),
+            ("one word changed (7/9 similar)", index.find(changed, "storybook|1280x720"), None),
+            ("other style or size", index.find(near, "fantasy|1280x720"), None),
+            ("lower threshold", PromptIndex(path, threshold=0.7).find(changed, "storybook|1280x720"), "key-1"),
+        ]
+        index.remove("key-1")
+        checks.append(("removed entry", index.find(near, "storybook|1280x720"), None))
+    for name, result, expected in checks:
+        if result != expected:
+            print(f"❌ {name}: got {result}, expected {expected}")
+            failed = True
+    if not failed:
+        print("✅ Prompt index OK")
+    return not failed
+
+def test_narration_chunks():
+    """Test narration chunking and that an edit keeps other chunks' cache keys (no server needed)."""
+    print("🔊 Testing narration chunks...")
+    from storyteller import split_narration, narration_cache_key
+    words = "river temple lamp monkey king drum festival mango elephant rain".split()
+    sentences = [
+        " ".join(words[(i * 3 + k) % len(words)] for k in range(4 + i * 5 % 9)).capitalize() + "."
+        for i in range(30)
+    ]
+    chunks = split_narration(" ".join(sentences), max_chars=200)
+    failed = False
+    if " ".join(chunks) != " ".join(sentences) or any(len(chunk) > 200 for chunk in chunks):
+        print("❌ Chunks do not cover the story in order within max_chars")
+        failed = True
+
+    edited = list(sentences)
+    edited[15] = "The old drummer smiled at the crowd."
+    old_keys = {narration_cache_key(chunk, "voice") for chunk in chunks}
+    new_keys = {narration_cache_key(chunk, "voice") for chunk in split_narration(" ".join(edited), max_chars=200)}
+    # Only the edited sentence's chunk (and at most the one after it) may change
+    if len(old_keys - new_keys) > 2 or len(old_keys & new_keys) < len(old_keys) - 2:
+        print(f"❌ Editing one sentence changed {len(old_keys - new_keys)} of {len(old_keys)} chunks")
+        failed = True
+    if not failed:
+        print("✅ Narration chunks OK")
+    return not failed
+
 def main():
     """Run all tests."""
     print("🚀 Starting Smart Cultural Storyteller System Tests")
     print("=" * 60)
     
     tests = [
+        ("Import Time Budget", test_import_time_budget),
+        ("Sentence Splitting", test_sentence_splitting),
+        ("Scene Planner", test_scene_planner),
+        ("Prompt Index", test_prompt_index),
+        ("Narration Chunks", test_narration_chunks),
         ("Health Check", test_health_check),
         ("Themes & Languages", test_themes_and_languages),
         ("Basic Story", test_basic_story),
+        ("Streaming Story", test_streaming_story),
         ("Cultural Story", test_cultural_story),
-        ("Themed Image", test_themed_image)
+        ("Seeded Story Cache", test_seeded_story_cache),
+        ("Concurrent Stories", test_concurrent_stories),
+        ("Themed Image", test_themed_image),
+        ("Metrics", test_metrics_endpoint)
     ]
     
     passed = 0
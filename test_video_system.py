@@ -201,7 +201,7 @@ def main():
     print("1. Ensure FFmpeg is installed (see FFMPEG_INSTALLATION.md)")
     print("2. Start the Flask backend: python app.py")
     print("3. Test video generation via API or frontend")
-    print("4. Generated videos will be saved in the 'static' folder")
+    print("4. Generated videos will be saved under 'static/jobs/<job_id>'")
 
 if __name__ == "__main__":
     main()
@@ -2,17 +2,22 @@ import os
 import json
 import subprocess
 from typing import List, Optional
+from metrics import track_stage
 
 
 def create_video_from_images_and_audio(
     images: List[str], 
     audio_file: str, 
     output_filename: str = "story_video.mp4", 
-    story_scenes: Optional[List[str]] = None
+    story_scenes: Optional[List[str]] = None,
+    work_dir: str = "static",
+    scene_durations: Optional[List[float]] = None
 ) -> str:
     """
     Create a video by combining multiple images with a single narration audio.
-    Each image duration is proportional to its scene text length relative to the full story.
+    Each image duration is proportional to its planned scene duration (or, without
+    a plan, its scene text length) relative to the full story.
+    The filelist and the output video are written to work_dir (the job's workspace).
     """
     try:
         print(f"🎬 Creating video with {len(images)} scenes and 1 narration audio...")
@@ -34,10 +39,11 @@ def create_video_from_images_and_audio(
 
         # --- Get total audio duration ---
         try:
-            result = subprocess.run([
-                "ffprobe", "-v", "quiet", "-print_format", "json",
-                "-show_format", audio_file
-            ], capture_output=True, text=True, check=True)
+            with track_stage("ffprobe"):
+                result = subprocess.run([
+                    "ffprobe", "-v", "quiet", "-print_format", "json",
+                    "-show_format", audio_file
+                ], capture_output=True, text=True, check=True)
             audio_info = json.loads(result.stdout)
             audio_duration = float(audio_info["format"]["duration"])
             print(f"🎧 Audio duration: {audio_duration:.2f} seconds")
@@ -46,7 +52,14 @@ def create_video_from_images_and_audio(
             audio_duration = len(valid_images) * 5.0
 
         # --- Calculate proportional durations ---
-        if story_scenes and len(story_scenes) == len(valid_images):
+        if scene_durations and len(scene_durations) == len(valid_images):
+            # Durations from the scene planner, stretched to the narration length
+            total_planned = sum(scene_durations)
+            durations = [
+                max(2.0, (d / total_planned) * audio_duration)
+                for d in scene_durations
+            ]
+        elif story_scenes and len(story_scenes) == len(valid_images):
             text_lengths = [len(s.strip()) for s in story_scenes]
             total_length = sum(text_lengths) if sum(text_lengths) > 0 else len(valid_images)
             durations = [
@@ -63,8 +76,8 @@ def create_video_from_images_and_audio(
             print(f"  Scene {i+1}: {d:.2f} seconds")
 
         # --- Create FFmpeg file list ---
-        filelist_path = "static/temp_filelist.txt"
-        os.makedirs("static", exist_ok=True)
+        filelist_path = os.path.join(work_dir, "temp_filelist.txt")
+        os.makedirs(work_dir, exist_ok=True)
         with open(filelist_path, "w", encoding="utf-8") as f:
             for i, img in enumerate(valid_images):
                 abs_path = os.path.abspath(img).replace("\\", "/")
@@ -74,7 +87,7 @@ def create_video_from_images_and_audio(
             f.write(f"file '{os.path.abspath(valid_images[-1]).replace('\\', '/')}'\n")
 
         # --- Run FFmpeg to create video ---
-        output_path = f"static/{output_filename}"
+        output_path = os.path.join(work_dir, output_filename)
         cmd = [
             "ffmpeg", "-y",
             "-f", "concat", "-safe", "0",
@@ -90,7 +103,10 @@ def create_video_from_images_and_audio(
         ]
 
         print("🚀 Running FFmpeg command...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        with track_stage("ffmpeg") as call:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                call.fail()
         if result.returncode != 0:
             print(f"❌ FFmpeg error:\n{result.stderr}")
             return f"Error creating video: {result.stderr}"
@@ -4,15 +4,19 @@ import subprocess
 from typing import List, Dict
 import json
 from video_compiler import create_video_from_images_and_audio  
+from metrics import track_stage
 
-def create_story_video(story_data: Dict, output_filename: str = "cultural_story_video.mp4") -> str:
+def create_story_video(story_data: Dict, output_filename: str = "cultural_story_video.mp4",
+                       work_dir: str = "static") -> str:
     """
     Create a complete story video from story data containing images and audio.
+    The video is written to work_dir (the job's workspace).
     """
     try:
         images = story_data.get('images', [])
         audio_file = story_data.get('audio_file', '')
         story_scenes = story_data.get('story_scenes', [])
+        scene_durations = story_data.get('scene_durations')
 
         
         if not images:
@@ -26,7 +30,9 @@ def create_story_video(story_data: Dict, output_filename: str = "cultural_story_
             images=images,
             audio_file=audio_file,
             output_filename=output_filename,
-            story_scenes=story_scenes  # 👈 new argument
+            story_scenes=story_scenes,  # 👈 new argument
+            work_dir=work_dir,
+            scene_durations=scene_durations
         )
         
     except Exception as e:
@@ -51,10 +57,11 @@ def get_video_info(video_path: str) -> Dict:
             return {"error": "Video file not found"}
         
         # Get video info using ffprobe
-        result = subprocess.run([
-            'ffprobe', '-v', 'quiet', '-print_format', 'json',
-            '-show_format', '-show_streams', video_path
-        ], capture_output=True, text=True, check=True)
+        with track_stage("ffprobe"):
+            result = subprocess.run([
+                'ffprobe', '-v', 'quiet', '-print_format', 'json',
+                '-show_format', '-show_streams', video_path
+            ], capture_output=True, text=True, check=True)
         
         info = json.loads(result.stdout)
         
@@ -0,0 +1,109 @@
+# warmup.py
+import threading
+import time
+
+# Heavy components (story model, TTS client, FFmpeg check) register
+# a loader here. Each one is loaded lazily by the code that needs it; the
+# background warm-up only gets there first so early requests do not pay for it.
+_components = {}
+_lock = threading.Lock()
+_warmup_thread = None
+
+
+def register_component(name: str, loader, required: bool = True):
+    """
+    Register a component for warm-up and readiness reporting.
+    loader() returns False when the component is unavailable, raises on error.
+    Optional components (required=False) do not block readiness.
+    """
+    with _lock:
+        _components[name] = {
+            "loader": loader,
+            "required": required,
+            "state": "pending",
+            "error": None,
+            "load_seconds": None,
+        }
+
+
+def warm_up_component(name: str) -> bool:
+    """Load one registered component now and record how it went."""
+    with _lock:
+        component = _components[name]
+        if component["state"] in ("loading", "ready"):
+            return component["state"] == "ready"
+        component["state"] = "loading"
+
+    started = time.perf_counter()
+    try:
+        result = component["loader"]()
+        state, error = ("unavailable", None) if result is False else ("ready", None)
+    except Exception as e:
+        state, error = "error", str(e)
+
+    with _lock:
+        component["state"] = state
+        component["error"] = error
+        component["load_seconds"] = round(time.perf_counter() - started, 2)
+
+    if state == "ready":
+        print(f"✅ {name} ready in {component['load_seconds']}s")
+    else:
+        print(f"⚠️ {name} {state} after {component['load_seconds']}s{': ' + error if error else ''}")
+    return state == "ready"
+
+
+def mark_ready(name: str):
+    """
+    Record that a component was loaded outside the warm-up (lazily, on first
+    use), so readiness does not depend on the warm-up having run.
+    Unregistered names are ignored.
+    """
+    with _lock:
+        component = _components.get(name)
+        if component is None or component["state"] == "ready":
+            return
+        component["state"] = "ready"
+        component["error"] = None
+    print(f"✅ {name} ready (loaded on first use)")
+
+
+def start_background_warmup() -> threading.Thread:
+    """Warm up all registered components in a daemon thread (only once)."""
+    global _warmup_thread
+    with _lock:
+        if _warmup_thread is not None:
+            return _warmup_thread
+        names = list(_components)
+
+        def _run():
+            for name in names:
+                warm_up_component(name)
+
+        _warmup_thread = threading.Thread(target=_run, name="warmup", daemon=True)
+        _warmup_thread.start()
+        return _warmup_thread
+
+
+def get_component_status() -> dict:
+    """Return state ("pending", "loading", "ready", "unavailable", "error") per component."""
+    with _lock:
+        return {
+            name: {
+                "state": component["state"],
+                "required": component["required"],
+                "error": component["error"],
+                "load_seconds": component["load_seconds"],
+            }
+            for name, component in _components.items()
+        }
+
+
+def is_ready() -> bool:
+    """True once every required component has loaded."""
+    with _lock:
+        return all(
+            component["state"] == "ready"
+            for component in _components.values()
+            if component["required"]
+        )
@@ -0,0 +1,89 @@
+# workspace.py
+import os
+import shutil
+import threading
+import time
+import uuid
+
+# Every request writes its artifacts (audio, scene images, filelist, video)
+# into its own static/jobs/<job_id>/ directory, so concurrent requests never
+# overwrite each other's files and each artifact gets a unique URL.
+# Job directories older than JOB_TTL_SECONDS are removed in the background.
+STATIC_DIR = "static"
+JOBS_DIR = os.path.join(STATIC_DIR, "jobs")
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://localhost:5000").rstrip("/")
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+JOB_CLEANUP_INTERVAL = float(os.getenv("JOB_CLEANUP_INTERVAL", "300"))
+
+_cleanup_thread = None
+_lock = threading.Lock()
+
+
+class Workspace:
+    """One job's private directory under static/jobs/."""
+
+    def __init__(self, job_id: str, root: str = JOBS_DIR):
+        self.job_id = job_id
+        self.directory = os.path.join(root, job_id)
+
+    def path(self, name: str) -> str:
+        """Path of an artifact inside this workspace."""
+        return os.path.join(self.directory, name)
+
+    def url(self, name: str) -> str:
+        """Public URL of an artifact inside this workspace."""
+        return artifact_url(self.path(name))
+
+
+def create_workspace() -> Workspace:
+    """Create a fresh workspace with a unique job id."""
+    workspace = Workspace(uuid.uuid4().hex[:16])
+    os.makedirs(workspace.directory, exist_ok=True)
+    return workspace
+
+
+def artifact_url(path: str) -> str:
+    """Public URL for a generated file under static/ (workspace or not)."""
+    relative = os.path.relpath(path, STATIC_DIR).replace(os.sep, "/")
+    return f"{PUBLIC_BASE_URL}/static/{relative}"
+
+
+def cleanup_expired_workspaces(ttl: float = JOB_TTL_SECONDS, root: str = JOBS_DIR) -> int:
+    """Remove job directories untouched for longer than ttl seconds; returns how many."""
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - ttl
+    removed = 0
+    for entry in os.scandir(root):
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path)
+                removed += 1
+        except OSError as e:
+            print(f"⚠️ Could not remove workspace {entry.name}: {e}")
+    if removed:
+        print(f"🧹 Removed {removed} expired job workspace(s)")
+    return removed
+
+
+def get_workspace_stats(root: str = JOBS_DIR) -> dict:
+    """Number of job workspaces currently on disk."""
+    jobs = sum(1 for entry in os.scandir(root) if entry.is_dir()) if os.path.isdir(root) else 0
+    return {"jobs": jobs, "ttl_seconds": JOB_TTL_SECONDS}
+
+
+def start_workspace_cleanup(interval: float = JOB_CLEANUP_INTERVAL) -> threading.Thread:
+    """Sweep expired workspaces every interval seconds in a daemon thread (only once)."""
+    global _cleanup_thread
+    with _lock:
+        if _cleanup_thread is not None:
+            return _cleanup_thread
+
+        def _run():
+            while True:
+                cleanup_expired_workspaces()
+                time.sleep(interval)
+
+        _cleanup_thread = threading.Thread(target=_run, name="workspace-cleanup", daemon=True)
+        _cleanup_thread.start()
+        return _cleanup_thread